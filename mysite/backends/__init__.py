@@ -0,0 +1 @@
+"""Database backends of the project."""
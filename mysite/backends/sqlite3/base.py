@@ -0,0 +1,30 @@
+"""SQLite backend that applies SQLITE_PRAGMAS to every new connection.
+
+With the default rollback journal, readers and the writer block each other
+and concurrent voters fail with "database is locked". WAL lets readers run
+alongside one writer, `busy_timeout` makes writers wait for each other
+instead of failing, and `synchronous=NORMAL` is durable enough under WAL
+while syncing far less often.
+
+Transactions start with SQLITE_TRANSACTION_MODE. A deferred transaction that
+reads before it writes cannot wait for the write lock and fails at once when
+another writer holds it; IMMEDIATE takes the lock up front, so it waits for
+`busy_timeout` instead.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite connection with configured pragmas and transaction mode."""
+
+    def get_new_connection(self, conn_params):
+        """Open a connection and apply SQLITE_PRAGMAS."""
+        connection = super().get_new_connection(conn_params)
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            connection.execute(f"PRAGMA {pragma} = {value}")
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        """Start a transaction with SQLITE_TRANSACTION_MODE."""
+        self.cursor().execute(f"BEGIN {settings.SQLITE_TRANSACTION_MODE}")
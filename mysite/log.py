@@ -0,0 +1,159 @@
+"""Non-blocking structured logging.
+
+Request threads only put records on a bounded queue through QueueHandler.
+A background QueueListener thread formats them as JSON with JsonFormatter
+and writes them in batches, so slow stderr or disk writes never hold up a
+request. When the queue is full, records are dropped and counted (policy
+"drop") or the logging thread waits for room (policy "block").
+AuditFileHandler writes each batch of audit events to a rotating file with
+a single flush.
+"""
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+
+# Attributes of every LogRecord, anything else was passed with `extra`.
+RECORD_ATTRIBUTES = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, with their `extra` fields."""
+
+    def format(self, record):
+        """Return the record as JSON."""
+        data = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update((key, value) for key, value in record.__dict__.items() if key not in RECORD_ATTRIBUTES)
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """Dequeue records in batches of up to `batch_size` and hand each batch to the handlers."""
+
+    def __init__(self, queue, *handlers, batch_size: int = 100):
+        """Listen on `queue` for records of `handlers`."""
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self):
+        """Wait for room for the sentinel, the queue may be full on shutdown."""
+        self.queue.put(self._sentinel)
+
+    def handle_batch(self, records: list):
+        """Pass records to each handler, as a whole batch if the handler can write batches."""
+        for handler in self.handlers:
+            accepted = [record for record in records if record.levelno >= handler.level]
+            if hasattr(handler, 'handle_batch'):
+                handler.handle_batch(accepted)
+            else:
+                for record in accepted:
+                    handler.handle(record)
+
+    def _monitor(self):
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+            stop = self._sentinel in batch
+            self.handle_batch([record for record in batch if record is not self._sentinel])
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Queue records for a BatchQueueListener that writes them to `handlers`.
+
+    `handlers` are references like "cfg://handlers.console" in a LOGGING
+    dict, to handlers whose names sort before the name of this handler.
+    Only the message is formatted in the logging thread.
+    """
+
+    def __init__(self, handlers, maxsize: int = 10000, policy: str = 'drop', batch_size: int = 100):
+        """Start a listener thread for the target handlers."""
+        # Items of a ConvertingList are only resolved when indexed.
+        targets = [handlers[index] for index in range(len(handlers))]
+        if not all(isinstance(target, logging.Handler) for target in targets):
+            # dictConfig configures handlers in the order of their names.
+            raise ValueError("Log queue targets must be configured first, name them to sort before the queue.")
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        super().__init__(queue.Queue(maxsize))
+        self.policy = policy
+        self.dropped = 0
+        self._unreported = 0
+        self.listener = BatchQueueListener(self.queue, *targets, batch_size=batch_size)
+        self.listener.start()
+        self._listening = True
+
+    def prepare(self, record):
+        """Return a copy of the record with its message merged, formatting is left to the listener."""
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        """Queue the record, or drop it when the queue is full and the policy is "drop"."""
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            return
+        if self._unreported:
+            warning = logging.LogRecord("mysite", logging.WARNING, __file__, 0,
+                                        "Dropped %d log records, the log queue was full.", (self._unreported,), None)
+            try:
+                self.queue.put_nowait(self.prepare(warning))
+                self._unreported = 0
+            except queue.Full:
+                pass
+
+    def close(self):
+        """Write queued records and stop the listener."""
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+        super().close()
+
+
+class AuditFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that writes a batch of records with one flush."""
+
+    def handle_batch(self, records: list):
+        """Write the records that pass the filters."""
+        records = [record for record in records if self.filter(record)]
+        if not records:
+            return
+        self.acquire()
+        try:
+            for record in records:
+                try:
+                    if self.shouldRollover(record):
+                        self.doRollover()
+                        if self.stream is None:
+                            self.stream = self._open()
+                    self.stream.write(self.format(record) + self.terminator)
+                except Exception:
+                    self.handleError(record)
+            self.flush()
+        finally:
+            self.release()
@@ -0,0 +1,242 @@
+"""Middleware of the project."""
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import connections
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+
+from .routers import replica_reads
+
+logger = logging.getLogger("mysite")
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries and their duration."""
+
+    def __init__(self):
+        """Start with no queries."""
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute the query and record its duration."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsStore:
+    """Keep the latest request samples of each view and summarize them."""
+
+    fields = ('queries', 'db_ms', 'render_ms', 'total_ms')
+
+    def __init__(self, size: int = 1000):
+        """Keep up to `size` samples per view."""
+        self.size = size
+        self._samples = defaultdict(lambda: deque(maxlen=self.size))
+        self._lock = threading.Lock()
+
+    def record(self, view: str, sample: dict):
+        """Add a sample of the view."""
+        with self._lock:
+            self._samples[view].append(tuple(sample[field] for field in self.fields))
+
+    def clear(self):
+        """Drop every sample."""
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> dict:
+        """Return the sample count and p50/p95/p99 of every field per view."""
+        with self._lock:
+            samples = {view: list(values) for view, values in self._samples.items()}
+        summary = {}
+        for view, values in samples.items():
+            summary[view] = {'count': len(values)}
+            for index, field in enumerate(self.fields):
+                column = sorted(value[index] for value in values)
+                summary[view][field] = {
+                    f'p{percent}': percentile(column, percent) for percent in (50, 95, 99)
+                }
+        return summary
+
+
+def percentile(values: list, percent: int):
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    rank = math.ceil(len(values) * percent / 100) - 1
+    return values[max(rank, 0)]
+
+
+metrics = MetricsStore(settings.REQUEST_METRICS_SAMPLES)
+
+
+# Counter of the request being served. Context variables follow the request
+# into sync_to_async threads, so queries of async views are counted too.
+_request_counter = contextvars.ContextVar('request_counter', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _request_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    """Count queries of `connection` for the request being served."""
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+connection_created.connect(install_query_counter)
+
+
+def check_connections(**kwargs):
+    """Close reused connections that the server dropped, before the request uses them.
+
+    Django 3.2 ignores the CONN_HEALTH_CHECKS database setting, so it is
+    honoured here. Connections in a transaction are left alone.
+    """
+    for connection in connections.all():
+        if (connection.settings_dict.get('CONN_HEALTH_CHECKS') and connection.connection is not None
+                and not connection.in_atomic_block and not connection.is_usable()):
+            connection.close()
+
+
+request_started.connect(check_connections)
+
+
+class RequestMetricsMiddleware:
+    """Record query count, database time, render time and latency of each request.
+
+    Each request is logged with the "mysite" logger and added to `metrics`,
+    whose percentiles are served by the staff-only metrics view.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Wrap the next handler."""
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Mark the instance as a coroutine function for the async handler.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        """Measure the request."""
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        counter = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_counter.set(None)
+        self.finish(request, response, counter)
+        return response
+
+    async def __acall__(self, request):
+        """Measure the request in async mode."""
+        counter = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_counter.set(None)
+        self.finish(request, response, counter)
+        return response
+
+    def start(self, request) -> QueryCounter:
+        """Start measuring the request."""
+        for connection in connections.all():
+            install_query_counter(connection)
+        counter = QueryCounter()
+        _request_counter.set(counter)
+        request.render_time = 0.0
+        request.start_time = time.perf_counter()
+        return counter
+
+    def finish(self, request, response, counter: QueryCounter):
+        """Record and log the measured request."""
+        total = time.perf_counter() - request.start_time
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        sample = {
+            'queries': counter.count,
+            'db_ms': round(counter.duration * 1000, 3),
+            'render_ms': round(request.render_time * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+        }
+        metrics.record(view, sample)
+        logger.info(
+            "view=%s method=%s status=%s queries=%d db_ms=%.3f render_ms=%.3f total_ms=%.3f",
+            view, request.method, response.status_code, sample['queries'],
+            sample['db_ms'], sample['render_ms'], sample['total_ms'],
+        )
+
+    def process_template_response(self, request, response):
+        """Measure rendering of template responses, which happens after this hook."""
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.render_time = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ReplicaMiddleware:
+    """Serve reads of safe requests from the replica unless the client wrote recently.
+
+    Unsafe requests (votes, sign ups, logins) use the default database and
+    set a cookie that pins the client to it for REPLICA_PIN_SECONDS, so the
+    next pages show the client's own writes despite replication lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        """Wrap the next handler."""
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Mark the instance as a coroutine function for the async handler.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        """Route reads of the request."""
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with replica_reads(self.use_replica(request)):
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        """Route reads of the request in async mode."""
+        with replica_reads(self.use_replica(request)):
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def use_replica(self, request) -> bool:
+        """Return True if reads of the request may be served by the replica."""
+        return (settings.DATABASE_REPLICA is not None and request.method in self.safe_methods
+                and settings.REPLICA_PIN_COOKIE not in request.COOKIES)
+
+    def pin(self, request, response):
+        """Pin the client to the default database after an unsafe request."""
+        if settings.DATABASE_REPLICA is not None and request.method not in self.safe_methods:
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
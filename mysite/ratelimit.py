@@ -0,0 +1,92 @@
+"""Token bucket rate limiting of costly endpoints.
+
+Each route of RATE_LIMITS has buckets keyed by client IP and by user,
+holding up to `requests` tokens refilled evenly over `seconds`. A POST to
+the route takes a token from each of its buckets and is answered with 429
+Too Many Requests when one is empty, before the view touches the database.
+Buckets live in the RATE_LIMIT_CACHE cache. Reads and writes of a bucket
+are not atomic, so concurrent requests may rarely get a token too many.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+KEY_PREFIX = 'ratelimit'
+
+
+def parse_rate(rate: str):
+    """Return (requests, seconds) of a "requests/seconds" rate."""
+    requests, seconds = rate.split('/')
+    return int(requests), float(seconds)
+
+
+def take(key: str, rate: str, now: float = None) -> float:
+    """Take a token from the bucket of `key`.
+
+    Returns:
+        float: 0 if a token was taken, otherwise seconds until the next token
+    """
+    capacity, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    cache = caches[settings.RATE_LIMIT_CACHE]
+    tokens, updated = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens < 1:
+        return (1 - tokens) * period / capacity
+    # A bucket left alone for `period` is full again, so it may expire then.
+    cache.set(key, (tokens - 1, now), math.ceil(period))
+    return 0
+
+
+def client_ip(request) -> str:
+    """Return the client IP address as seen by the first of RATE_LIMIT_TRUSTED_PROXIES proxies.
+
+    Clients can put anything in X-Forwarded-For, so only the entries
+    appended by trusted proxies are used, counted from the right.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    if proxies and len(forwarded) >= proxies and forwarded[-proxies]:
+        return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def user_key(request, ip: str):
+    """Return a key of the user sending the request without querying the database, or None.
+
+    Logins are keyed by the submitted username and the client IP, so
+    password guesses are throttled without letting others lock the account
+    owner out. Other requests are keyed by the session cookie.
+    """
+    if request.resolver_match.view_name == 'login':
+        username = request.POST.get('username', '').strip().lower()
+        return f'username:{username}:{ip}' if username else None
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return f'session:{hashlib.sha256(session.encode()).hexdigest()}' if session else None
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """Reject POST requests to routes of RATE_LIMITS whose buckets are empty."""
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Take a token from every bucket of the route or return a 429 response."""
+        view_name = request.resolver_match.view_name
+        limits = settings.RATE_LIMITS.get(view_name) if settings.RATE_LIMIT_ENABLED else None
+        if not limits or request.method != 'POST':
+            return None
+        ip = client_ip(request)
+        keys = {'ip': f'ip:{ip}', 'user': user_key(request, ip)}
+        wait = 0
+        for scope, rate in limits.items():
+            if keys[scope] is not None:
+                wait = max(wait, take(f'{KEY_PREFIX}:{view_name}:{keys[scope]}', rate))
+        if not wait:
+            return None
+        response = HttpResponse("Too many requests, try again later.\n", status=429, content_type='text/plain')
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
@@ -0,0 +1,69 @@
+"""Database routers of the project."""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Apps whose reads may be served by the replica.
+REPLICA_APPS = {'polls'}
+
+# Set for requests whose reads may be served by the replica, see
+# mysite.middleware.ReplicaMiddleware.
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads(enabled: bool = True):
+    """Let reads of poll models inside the block go to the replica."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary_reads():
+    """Read poll models from the default database inside the block.
+
+    Shared caches are filled under it, so clients pinned to the default
+    database never get results cached from a lagging replica.
+    """
+    return replica_reads(False)
+
+
+class ReplicaRouter:
+    """Route reads of poll models to the DATABASE_REPLICA alias inside replica_reads().
+
+    Everything else, including every write, uses the default database, so
+    code outside requests and votes in flight always see their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Return the replica for poll models while replica reads are enabled, otherwise the default database.
+
+        The default database is returned explicitly, or related objects of an
+        instance read from the replica would follow it there.
+        """
+        if settings.DATABASE_REPLICA and model._meta.app_label in REPLICA_APPS:
+            return settings.DATABASE_REPLICA if _replica_reads.get() else DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        """Write poll models to the default database, even when read from the replica."""
+        if model._meta.app_label in REPLICA_APPS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations between objects of the default database and its replica."""
+        databases = {DEFAULT_DB_ALIAS, settings.DATABASE_REPLICA}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Never migrate the replica, which is a copy of the default database."""
+        if db == settings.DATABASE_REPLICA:
+            return False
+        return None
@@ -43,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mysite.middleware.RequestMetricsMiddleware',
+    'mysite.middleware.ReplicaMiddleware',
+    'mysite.ratelimit.RateLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,16 +55,38 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Number of samples kept per view by RequestMetricsMiddleware.
+REQUEST_METRICS_SAMPLES = config('REQUEST_METRICS_SAMPLES', default=1000, cast=int)
+
+# Token buckets of POST requests per view name, keyed by client IP and by
+# user (session, or submitted username and IP), as "requests/seconds".
+# The client IP is REMOTE_ADDR, or the X-Forwarded-For entry appended by the
+# first of RATE_LIMIT_TRUSTED_PROXIES reverse proxies.
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+RATE_LIMIT_TRUSTED_PROXIES = config('RATE_LIMIT_TRUSTED_PROXIES', default=0, cast=int)
+RATE_LIMIT_CACHE = config('RATE_LIMIT_CACHE', default='default')
+RATE_LIMITS = {
+    'polls:vote': {'ip': '120/60', 'user': '10/60'},
+    'login': {'ip': '30/60', 'user': '5/300'},
+    'signup': {'ip': '10/3600'},
+}
+
 LOGIN_REDIRECT_URL = "/polls/"
 LOGOUT_REDIRECT_URL = "/polls/"
 
 ROOT_URLCONF = 'mysite.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Compiled templates are kept in memory unless templates are edited live.
+TEMPLATE_CACHED_LOADERS = config('TEMPLATE_CACHED_LOADERS', default=not DEBUG, cast=bool)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, "templates")],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -69,26 +94,67 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': ([('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+                        if TEMPLATE_CACHED_LOADERS else TEMPLATE_LOADERS),
         },
     },
 ]
 
+# Records are queued by request threads and written as JSON by a background
+# thread. When the queue is full, LOG_QUEUE_POLICY "drop" drops records and
+# "block" makes the logging thread wait. Audit events (votes, logins) go to
+# the rotating AUDIT_LOG_FILE when it is set, otherwise to the console.
+# Queue handlers are named to sort after their targets, which dictConfig
+# configures first.
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+LOG_QUEUE_POLICY = config('LOG_QUEUE_POLICY', default='drop')
+AUDIT_LOG_FILE = config('AUDIT_LOG_FILE', default='')
+AUDIT_LOG_MAX_BYTES = config('AUDIT_LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+AUDIT_LOG_BACKUP_COUNT = config('AUDIT_LOG_BACKUP_COUNT', default=5, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'mysite.log.JsonFormatter',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'mysite.log.QueueHandler',
+            'handlers': ['cfg://handlers.console'],
+            'maxsize': LOG_QUEUE_SIZE,
+            'policy': LOG_QUEUE_POLICY,
         },
     },
     'loggers': {
         '': {
-            'handlers': ['console'],
+            'handlers': ['queue'],
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
-            'formatter': 'verbose'
         },
     },
 }
+if AUDIT_LOG_FILE:
+    LOGGING['handlers']['audit_file'] = {
+        'class': 'mysite.log.AuditFileHandler',
+        'filename': AUDIT_LOG_FILE,
+        'maxBytes': AUDIT_LOG_MAX_BYTES,
+        'backupCount': AUDIT_LOG_BACKUP_COUNT,
+        'delay': True,
+        'formatter': 'json',
+    }
+    LOGGING['handlers']['queue_audit'] = {
+        '()': 'mysite.log.QueueHandler',
+        'handlers': ['cfg://handlers.audit_file'],
+        'maxsize': LOG_QUEUE_SIZE,
+        'policy': LOG_QUEUE_POLICY,
+    }
+    LOGGING['loggers']['audit'] = {'handlers': ['queue_audit'], 'level': 'INFO', 'propagate': False}
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
@@ -98,10 +164,107 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': config('DB_ENGINE', default='mysite.backends.sqlite3'),
+        'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        'USER': config('DB_USER', default=''),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': config('DB_HOST', default=''),
+        'PORT': config('DB_PORT', default=''),
+        # Seconds a connection is reused across requests (0 closes it after
+        # each request). Use a pooler such as PgBouncer to share connections
+        # between processes.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # Check reused connections before each request, see
+        # mysite.middleware.check_connections.
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+    }
+}
+
+# Read replica of the default database, used for reads of poll models by
+# safe requests. Clients are pinned to the default database for
+# REPLICA_PIN_SECONDS after a write so they read their own votes. SQLite
+# replicas are refreshed with `manage.py sync_replica`.
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+DATABASE_REPLICA = 'replica' if DB_REPLICA_NAME else None
+if DATABASE_REPLICA:
+    DATABASES[DATABASE_REPLICA] = {
+        **DATABASES['default'],
+        'NAME': DB_REPLICA_NAME,
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_ROUTERS = ['mysite.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+# Pragmas and transaction mode of mysite.backends.sqlite3 connections.
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
 }
+SQLITE_TRANSACTION_MODE = config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE')
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ku-polls'),
+    }
+}
+
+# Cache alias and timeouts (in seconds) of question results.
+POLLS_RESULTS_CACHE = 'default'
+POLLS_RESULTS_CACHE_TIMEOUT = config('POLLS_RESULTS_CACHE_TIMEOUT', default=300, cast=int)
+POLLS_CLOSED_RESULTS_CACHE_TIMEOUT = config('POLLS_CLOSED_RESULTS_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Longest time (in seconds) the index is cached before the next question is
+# published or closes, and time closed results pages are cached.
+POLLS_PAGE_CACHE_TIMEOUT = config('POLLS_PAGE_CACHE_TIMEOUT', default=60 * 60, cast=int)
+POLLS_CLOSED_PAGE_CACHE_TIMEOUT = config('POLLS_CLOSED_PAGE_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Whether finalize_polls warms the results cache and page of closed
+# questions. Caches local to its process never reach the web workers, so
+# this is off with the local memory and dummy backends.
+POLLS_WARM_CLOSED_RESULTS = config('POLLS_WARM_CLOSED_RESULTS', cast=bool,
+                                   default=not CACHES['default']['BACKEND'].endswith(('.LocMemCache', '.DummyCache')))
+
+# Time (in seconds) rendered question list items and results tables are
+# cached. Their keys change with the question, so this only bounds memory.
+POLLS_FRAGMENT_CACHE_TIMEOUT = config('POLLS_FRAGMENT_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+
+# Serve async poll views, for ASGI deployments. Results are not updated
+# live with them, streams are only served by the sync views.
+POLLS_ASYNC_VIEWS = config('POLLS_ASYNC_VIEWS', default=False, cast=bool)
+
+# Number of questions on each page of the index.
+POLLS_INDEX_PAGE_SIZE = config('POLLS_INDEX_PAGE_SIZE', default=20, cast=int)
+
+# Vote ingestion: "sync" writes each vote in its request, "buffered" queues
+# votes and writes them in batches from a background thread.
+POLLS_VOTE_INGESTION = config('POLLS_VOTE_INGESTION', default='sync')
+POLLS_VOTE_BATCH_SIZE = config('POLLS_VOTE_BATCH_SIZE', default=500, cast=int)
+POLLS_VOTE_FLUSH_INTERVAL = config('POLLS_VOTE_FLUSH_INTERVAL', default=0.5, cast=float)
+POLLS_VOTE_BUFFER_LIMIT = config('POLLS_VOTE_BUFFER_LIMIT', default=10000, cast=int)
+
+
+# Whether open results pages subscribe to a live results stream. Every
+# stream holds a worker thread for up to POLLS_LIVE_MAX_DURATION seconds, so
+# only enable it on servers with many threads or green threads (gevent).
+POLLS_LIVE_RESULTS = config('POLLS_LIVE_RESULTS', default=False, cast=bool)
+
+# Live results streams: seconds between two pushes, between keepalive
+# comments and before the browser reconnects, and reconnect delay in ms.
+POLLS_LIVE_INTERVAL = config('POLLS_LIVE_INTERVAL', default=1.0, cast=float)
+POLLS_LIVE_KEEPALIVE = config('POLLS_LIVE_KEEPALIVE', default=15.0, cast=float)
+POLLS_LIVE_MAX_DURATION = config('POLLS_LIVE_MAX_DURATION', default=300.0, cast=float)
+POLLS_LIVE_RETRY = config('POLLS_LIVE_RETRY', default=3000, cast=int)
 
 
 # Password validation
@@ -126,6 +289,24 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Hashers of stored passwords, the first one hashes new passwords and
+# passwords of other hashers are upgraded on login.
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+PASSWORD_HASHERS = config('PASSWORD_HASHERS', cast=Csv(), default=','.join([
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]))
+
+
+# Sessions: "db" queries the session table on every authenticated request,
+# "cached_db" reads through the SESSION_CACHE_ALIAS cache and "signed_cookies"
+# keeps sessions in the client without server storage.
+# https://docs.djangoproject.com/en/3.2/topics/http/sessions/
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + config('SESSION_BACKEND', default='db')
+SESSION_CACHE_ALIAS = config('SESSION_CACHE_ALIAS', default='default')
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
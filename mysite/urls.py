@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
-from .views import signup
+from .views import request_metrics, signup
 
 urlpatterns = [
     # Reverse cannot be used here. It results in circular import.
@@ -25,5 +25,6 @@ urlpatterns = [
     path('polls/', include('polls.urls')),
     path('admin/', admin.site.urls),
     path('accounts/', include('django.contrib.auth.urls')),
-    path('signup/', signup, name="signup")
+    path('signup/', signup, name="signup"),
+    path('metrics/', request_metrics, name="metrics"),
 ]
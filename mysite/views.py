@@ -1,49 +1,47 @@
 """Views for entire project."""
-from django.contrib.auth import authenticate, login, user_login_failed, user_logged_in, user_logged_out
+from django.contrib.auth import login, user_login_failed, user_logged_in, user_logged_out
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.forms import UserCreationForm
 from django.dispatch import receiver
-from django.http import HttpRequest
+from django.http import HttpRequest, JsonResponse
 from django.shortcuts import render, redirect
 import logging
 
-logger = logging.getLogger("mysite")
+from polls.cache import cache_stats
+from .middleware import metrics
+from .ratelimit import client_ip
 
+# Audit events, see LOGGING in settings.
+audit = logging.getLogger("audit")
 
-def get_ip_address(request: HttpRequest) -> str:
-    """Get the visitor's IP address using request headers.
 
-    If the request is forwarded, takes the first IP address (separated by ,).
-    Otherwise, take the whole header as IP address.
-    """
-    # HTTP_X_FORWARDED_FOR is non-standard request for forwarding ip.
-    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-    if x_forwarded_for:
-        # Take the first IP
-        ip_address = x_forwarded_for.split(",")[0]
-    else:
-        ip_address = request.META.get("REMOTE_ADDR")
-    return ip_address
+def get_ip_address(request: HttpRequest) -> str:
+    """Get the visitor's IP address the same way as the rate limits, see ratelimit.client_ip()."""
+    return client_ip(request)
 
 
 @receiver(user_login_failed)
 def log_failed_login(sender, credentials, request, **kwargs):
     """Log failed login attempt."""
     user_ip = get_ip_address(request)
-    logger.warning(f"Invalid login for {credentials['username']} from {user_ip}")
+    audit.warning("Invalid login for %s from %s", credentials.get('username'), user_ip,
+                  extra={'event': 'login_failed', 'username': credentials.get('username'), 'ip': user_ip})
 
 
 @receiver(user_logged_in)
 def log_login(sender, request, user, **kwargs):
     """Log normal login."""
     user_ip = get_ip_address(request)
-    logger.info(f"{user.username} logged in from {user_ip}")
+    audit.info("%s logged in from %s", user.username, user_ip,
+               extra={'event': 'login', 'username': user.username, 'ip': user_ip})
 
 
 @receiver(user_logged_out)
 def log_logout(sender, request, user, **kwargs):
     """Log when user logout."""
     user_ip = get_ip_address(request)
-    logger.info(f"{user.username} logged out from {user_ip}.")
+    audit.info("%s logged out from %s.", user.username, user_ip,
+               extra={'event': 'logout', 'username': user.username, 'ip': user_ip})
 
 
 def signup(request):
@@ -55,13 +53,17 @@ def signup(request):
     if request.method == 'POST':
         form = UserCreationForm(request.POST)
         if form.is_valid():
-            form.save()
-            username = form.cleaned_data.get("username")
-            raw_password = form.cleaned_data.get("password")
-            user = authenticate(username=username, password=raw_password)
+            # The password was just hashed, log in without checking it again.
+            user = form.save()
             login(request, user)
-            return redirect('polls')
+            return redirect('polls:index')
         else:
             return render(request, "registration/signup.html", {"form": form})
     form = UserCreationForm()
     return render(request, "registration/signup.html", {"form": form})
+
+
+@staff_member_required
+def request_metrics(request):
+    """Return request percentiles per view and results cache counters as JSON."""
+    return JsonResponse({'views': metrics.summary(), 'results_cache': cache_stats()})
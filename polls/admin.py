@@ -1,28 +1,142 @@
 """Admin site configuration for poll application."""
+from functools import partial
+
 from django.contrib import admin
-from .models import Question, Choice
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from . import search
+from .models import Question, Choice, Vote
+from .views import results_changed
 
 
 # Register your models here.
 
 class ChoiceInline(admin.TabularInline):
-    """Inline choice for question admin panel."""
+    """Inline choice for question admin panel.
+
+    Django cannot paginate inlines, so the vote counters are shown read-only
+    from the choice rows instead of being counted from votes.
+    """
 
     model = Choice
     extra = 3
+    fields = ('choice_text', 'votes')
+    readonly_fields = ('votes',)
+
+
+def request_now(request):
+    """Return the moment question states are evaluated at for the request."""
+    if not hasattr(request, '_polls_now'):
+        request._polls_now = timezone.now()
+    return request._polls_now
+
+
+class StateListFilter(admin.SimpleListFilter):
+    """Filter questions by state like the tabs of the index."""
+
+    title = 'state'
+    parameter_name = 'state'
+
+    def lookups(self, request, model_admin):
+        """Return the selectable states."""
+        return (('open', 'Open'), ('closed', 'Closed'))
+
+    def queryset(self, request, queryset):
+        """Return questions in the selected state."""
+        if self.value() in ('open', 'closed'):
+            return queryset.in_state(self.value(), request_now(request))
+        return queryset
 
 
 class QuestionAdmin(admin.ModelAdmin):
-    """Question admin site configuration."""
+    """Question admin site configuration.
 
-    list_display = ('question_text', 'pub_date', 'was_published_recently')
-    list_filter = ['pub_date']
+    Vote totals are annotated in the list query, searches use the full-text
+    index when the database has one, and the list skips counting every
+    question.
+    """
+
+    list_display = ('question_text', 'pub_date', 'published_recently', 'is_open', 'total_votes')
+    list_filter = [StateListFilter, 'pub_date']
     search_fields = ['question_text']
+    show_full_result_count = False
     fieldsets = (
         (None,   {'fields': ['question_text']}),
         ('Date Information', {'fields': ['pub_date', 'end_date']})
     )
     inlines = [ChoiceInline]
 
+    def get_queryset(self, request):
+        """Annotate the state of questions, evaluated once per request, and their vote totals.
+
+        Totals are summed from the choice counters in a subquery, which only
+        runs for the questions on the page.
+        """
+        totals = (Choice.objects.filter(question=OuterRef('pk')).order_by()
+                  .values('question').annotate(total=Sum('votes')).values('total'))
+        return super().get_queryset(request).with_state(request_now(request)).annotate(total_votes=Subquery(totals))
+
+    def save_model(self, request, obj, form, change):
+        """Save only the fields of the form, so a stale form cannot undo the finalization of the question."""
+        if change:
+            obj.save(update_fields=[*form.fields, 'modified'])
+        else:
+            super().save_model(request, obj, form, change)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search question texts with the full-text index when available."""
+        results = search.search_questions(queryset, search_term)
+        if results is None:
+            return super().get_search_results(request, queryset, search_term)
+        return results, False
+
+    @admin.display(boolean=True, ordering='pub_date', description='Published recently?')
+    def published_recently(self, question):
+        """Return the annotated recent publication state."""
+        return question.published_recently
+
+    @admin.display(boolean=True, ordering='end_date', description='Open?')
+    def is_open(self, question):
+        """Return the annotated open state."""
+        return question.is_open
+
+    @admin.display(ordering='total_votes', description='Votes')
+    def total_votes(self, question):
+        """Return the annotated number of votes."""
+        return question.total_votes or 0
+
+
+class VoteAdmin(admin.ModelAdmin):
+    """Vote admin site configuration.
+
+    Votes are only cast by voters, so they cannot be added or edited here.
+    Deleted votes are taken off the choice counters like retracted ones.
+    """
+
+    list_display = ('id', 'voter', 'question', 'choice')
+    list_select_related = ('voter', 'question', 'choice')
+    search_fields = ['=voter__username']
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        """Votes are cast by voters only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Votes are cast by voters only."""
+        return False
+
+    def delete_model(self, request, obj):
+        """Delete the vote through the counters."""
+        self.delete_queryset(request, Vote.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        """Delete the votes through the counters and drop cached results of their questions."""
+        for question_id in Vote.objects.retract(queryset):
+            transaction.on_commit(partial(results_changed, question_id))
+
 
 admin.site.register(Question, QuestionAdmin)
+admin.site.register(Vote, VoteAdmin)
@@ -0,0 +1,136 @@
+"""JSON read API of poll application.
+
+Detail and results responses carry an ETag and Last-Modified derived from
+the question's vote `version`, `modified` time and open state. ETags use
+`modified` to the microsecond, so edits within a second are seen. Conditional
+requests are answered with 304 Not Modified after a single lookup of those
+columns, without building the payload. Question lists are validated with
+an ETag of the same columns of every question on the page. export() streams the polls data to staff as JSON
+Lines or CSV.
+"""
+import datetime
+import hashlib
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition, require_GET
+
+from . import export as exporter
+from .cache import get_results
+from .models import Question
+from .views import CURSOR_EPOCH, IndexView, encode_cursor
+
+
+def _question_state(request, pk: int):
+    """Return (version, modified, is_open) of a published question, once per request."""
+    if not hasattr(request, '_question_state'):
+        now = timezone.now()
+        request._question_state = (Question.objects.published(now).with_state(now).filter(pk=pk)
+                                   .values_list('version', 'modified', 'is_open').first())
+    return request._question_state
+
+
+def _micros(value: datetime.datetime) -> int:
+    return (value - CURSOR_EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def question_etag(request, pk: int):
+    """Return the ETag of a published question or None if it does not exist."""
+    state = _question_state(request, pk)
+    if state is None:
+        return None
+    version, modified, is_open = state
+    return f'"{pk}-{version}-{_micros(modified)}-{int(is_open)}"'
+
+
+def question_last_modified(request, pk: int):
+    """Return the last modification of a published question."""
+    state = _question_state(request, pk)
+    return state[1] if state else None
+
+
+def _not_found():
+    return JsonResponse({'detail': "Question not found"}, status=404)
+
+
+def _serialize_question(question: Question) -> dict:
+    return {
+        'id': question.id,
+        'question_text': question.question_text,
+        'pub_date': question.pub_date,
+        'end_date': question.end_date,
+        'version': question.version,
+    }
+
+
+@require_GET
+def question_list(request):
+    """Return a page of published questions, see views.IndexView."""
+    view = IndexView()
+    view.setup(request)
+    page = view.get_queryset()
+    questions = [{**_serialize_question(question), 'is_open': question.is_open} for question in page]
+    data = {
+        'questions': questions,
+        'next': encode_cursor(page[-1]) if page and view.has_next else None,
+        'previous': encode_cursor(page[0]) if page and view.has_previous else None,
+    }
+    fingerprint = ";".join(f"{q.id}-{q.version}-{_micros(q.modified)}-{int(q.is_open)}" for q in page)
+    digest = hashlib.sha256(f"{fingerprint}|{data['next']}|{data['previous']}".encode()).hexdigest()
+    etag = quote_etag(digest[:32])
+    response = get_conditional_response(request, etag=etag) or JsonResponse(data)
+    response['ETag'] = etag
+    return response
+
+
+@require_GET
+@condition(etag_func=question_etag, last_modified_func=question_last_modified)
+def question_detail(request, pk: int):
+    """Return a published question with its choices."""
+    question = Question.objects.published().with_state().filter(pk=pk).first()
+    if question is None:
+        return _not_found()
+    data = _serialize_question(question)
+    data['is_open'] = question.is_open
+    data['choices'] = list(question.choice_set.order_by('id').values('id', 'choice_text'))
+    return JsonResponse(data)
+
+
+@require_GET
+@condition(etag_func=question_etag, last_modified_func=question_last_modified)
+def question_results(request, pk: int):
+    """Return results of a published question."""
+    question = Question.objects.published().filter(pk=pk).first()
+    if question is None:
+        return _not_found()
+    return JsonResponse({'question': _serialize_question(question), **get_results(question)})
+
+
+@require_GET
+@staff_member_required
+def export(request):
+    """Stream questions and choices with their counts, and with `ballots=1` users and votes.
+
+    `format=jsonl` (default) streams every record, `format=csv` streams the
+    CSV file of one `model` (default choice). Password hashes are left out,
+    they are only exported by the `export_polls` command.
+    """
+    ballots = request.GET.get('ballots') == '1'
+    models = exporter.export_models(ballots)
+    if request.GET.get('format', 'jsonl') == 'csv':
+        model = request.GET.get('model', 'choice')
+        if model not in models:
+            return JsonResponse({'detail': f"Unknown model: {model}"}, status=400)
+        lines = exporter.csv_lines(model, exporter.export_records(model, passwords=False))
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+        filename = f"{model}s.csv"
+    else:
+        lines = exporter.jsonl_lines(exporter.export_records(ballots=ballots, passwords=False))
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        filename = "polls.jsonl"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
@@ -7,3 +7,7 @@ class PollsConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'polls'
+
+    def ready(self):
+        """Connect signal receivers."""
+        from . import signals  # noqa: F401
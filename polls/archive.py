@@ -0,0 +1,94 @@
+"""Archival of votes of finalized questions.
+
+Once a question is finalized its counts live in FinalResult rows, so its
+Vote rows are only needed for audits. archive() moves them into a single
+VoteArchive row of zlib-compressed JSON Lines and deletes them, keeping the
+Vote table down to questions that can still change. read_ballots() reads
+ballots back from either place and restore() moves them back when voting
+on a question is extended.
+"""
+import json
+import logging
+import zlib
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Choice, Question, Vote, VoteArchive
+
+logger = logging.getLogger("polls")
+
+
+def compress(ballots) -> bytes:
+    """Return (voter id, choice id) pairs as compressed JSON Lines."""
+    lines = "".join(json.dumps({'voter': voter_id, 'choice': choice_id}) + "\n" for voter_id, choice_id in ballots)
+    return zlib.compress(lines.encode(), 9)
+
+
+def decompress(data: bytes):
+    """Yield ballots as dicts from compressed JSON Lines."""
+    for line in zlib.decompress(bytes(data)).decode().splitlines():
+        yield json.loads(line)
+
+
+def archive(question_id: int) -> int:
+    """Move the votes of a finalized question into its archive.
+
+    Returns:
+        int: Number of archived votes, 0 if the question is not finalized or already archived
+    """
+    with transaction.atomic():
+        question = (Question.objects.select_for_update()
+                    .filter(pk=question_id, finalized_at__isnull=False, vote_archive__isnull=True).first())
+        if question is None:
+            return 0
+        votes = Vote.objects.filter(question=question)
+        ballots = list(votes.order_by('id').values_list('voter_id', 'choice_id'))
+        VoteArchive.objects.create(question=question, ballots=compress(ballots), count=len(ballots))
+        votes.delete()
+    logger.info("Archived %d vote(s) of question %s.", len(ballots), question_id)
+    return len(ballots)
+
+
+def archive_due() -> dict:
+    """Archive the votes of every finalized question that is not archived yet.
+
+    Returns:
+        dict: Number of archived votes per question id
+    """
+    due = Question.objects.filter(finalized_at__isnull=False, vote_archive__isnull=True)
+    return {question_id: archive(question_id) for question_id in due.values_list('id', flat=True)}
+
+
+def read_ballots(question_id: int):
+    """Yield the ballots of a question as dicts, from its archive or the Vote table."""
+    data = VoteArchive.objects.filter(question_id=question_id).values_list('ballots', flat=True).first()
+    if data is not None:
+        yield from decompress(data)
+        return
+    votes = Vote.objects.filter(question_id=question_id).order_by('id').values_list('voter_id', 'choice_id')
+    for voter_id, choice_id in votes.iterator():
+        yield {'voter': voter_id, 'choice': choice_id}
+
+
+def restore(question_id: int) -> int:
+    """Move archived votes of a question back into the Vote table.
+
+    Ballots of users or choices deleted since archival are dropped.
+
+    Returns:
+        int: Number of restored votes
+    """
+    with transaction.atomic():
+        archived = VoteArchive.objects.select_for_update().filter(question_id=question_id).first()
+        if archived is None:
+            return 0
+        ballots = list(decompress(archived.ballots))
+        choice_ids = set(Choice.objects.filter(question_id=question_id).values_list('id', flat=True))
+        voter_ids = set(User.objects.filter(pk__in={ballot['voter'] for ballot in ballots})
+                        .values_list('id', flat=True))
+        votes = [Vote(question_id=question_id, voter_id=ballot['voter'], choice_id=ballot['choice'])
+                 for ballot in ballots if ballot['choice'] in choice_ids and ballot['voter'] in voter_ids]
+        Vote.objects.bulk_create(votes, batch_size=500)
+        archived.delete()
+    return len(votes)
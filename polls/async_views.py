@@ -0,0 +1,106 @@
+"""Async views for poll application.
+
+Django 3.2 has no async ORM, so each view gathers everything that touches
+the database (the question, its choices or results, the session-backed user
+and messages) in a single sync_to_async call. Templates are then rendered
+in the event loop from fully loaded context, so a request holds a thread
+from the sync pool only while its queries run.
+
+They are served instead of the sync views when POLLS_ASYNC_VIEWS is set.
+Results pages are not updated live then, see polls.live.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import prefetch_related_objects
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.urls import reverse
+
+from . import http_cache, views
+
+
+def _load_request_state(request, context: dict) -> dict:
+    """Load the user and pending messages so rendering does not query the session."""
+    # Reading the lazy user loads the session and the user.
+    request.user.is_authenticated
+    context['messages'] = list(messages.get_messages(request))
+    return context
+
+
+def _not_found(request):
+    messages.add_message(request, messages.ERROR, "Question not found")
+    return redirect(reverse('polls:index'))
+
+
+async def index(request):
+    """Display latest questions."""
+    view = views.IndexView()
+    view.setup(request)
+
+    def load():
+        context = view.get_page_context()
+        max_age = http_cache.page_timeout(http_cache.next_transition()) if view.shared else None
+        return _load_request_state(request, context), max_age
+
+    context, max_age = await sync_to_async(load)()
+    response = render(request, view.template_name, context)
+    if max_age is None:
+        return http_cache.patch_private_cache(response)
+    return http_cache.patch_shared_cache(response, max_age)
+
+
+async def detail(request, pk: int):
+    """Question detail page, see views.DetailView."""
+    view = views.DetailView()
+    view.setup(request, pk=pk)
+
+    def load():
+        if http_cache.get_results_page(pk) is not None:
+            return views.closed_redirect(pk)
+        try:
+            view.object = view.get_object()
+        except Http404:
+            return _not_found(request)
+        if not view.object.is_open:
+            return views.closed_redirect(view.object.id)
+        prefetch_related_objects([view.object], 'choice_set')
+        return _load_request_state(request, view.get_context_data(object=view.object))
+
+    context = await sync_to_async(load)()
+    if not isinstance(context, dict):
+        return context
+    return render(request, view.template_name, context)
+
+
+async def results(request, pk: int):
+    """Question result page, see views.ResultsView."""
+    view = views.ResultsView()
+    view.setup(request, pk=pk)
+
+    def load():
+        response = view.get_cached_response()
+        if response is not None:
+            return response
+        try:
+            view.object = view.get_object()
+        except Http404:
+            return _not_found(request)
+        context = view.get_context_data(object=view.object)
+        # Live results streams are not served under ASGI.
+        context['live'] = False
+        return context
+
+    context = await sync_to_async(load)()
+    if not isinstance(context, dict):
+        return context
+    response = render(request, view.template_name, context)
+    if view.is_closed():
+        await sync_to_async(http_cache.set_results_page)(view.object.id, response.content)
+        http_cache.patch_shared_cache(response, settings.POLLS_CLOSED_PAGE_CACHE_TIMEOUT)
+    return response
+
+
+async def vote(request, question_id: int):
+    """Vote on a question, see views.vote."""
+    return await sync_to_async(views.vote)(request, question_id)
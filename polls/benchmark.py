@@ -0,0 +1,199 @@
+"""Load test and benchmark harness for the poll views.
+
+`seed()` fills the database with synthetic questions, choices, users and
+votes. `run()` drives the index, detail, results and vote endpoints, and
+optionally login and signup, through Django's test client from several
+threads and reports throughput, latency percentiles and queries per
+request. `render()` compares template render times with and without
+cached loaders and fragment caching. The `benchmark` management command
+seeds a throwaway database, runs the load test against it, with --render
+the render comparison too, and saves the report as JSON.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection, connections
+from django.template.backends.django import DjangoTemplates
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from mysite.middleware import QueryCounter, percentile
+from . import seeding, views
+from .models import Choice, Question
+
+ENDPOINTS = ('index', 'detail', 'results', 'vote')
+# Endpoints that hash or check passwords, benchmarked on request.
+AUTH_ENDPOINTS = ('login', 'signup')
+# Password of seeded users, hashed once with the configured hasher.
+PASSWORD = "benchmark-Password1"
+# Template configurations compared by render(): (cached loaders, fragment caching).
+RENDER_CONFIGS = {'uncached': (False, False), 'cached': (True, True)}
+
+
+def seed(questions: int = 100, choices: int = 4, users: int = 100, votes: int = 1000,
+         batch_size: int = 1000, rng: random.Random = None) -> dict:
+    """Create synthetic polls data in an empty database.
+
+    Half of the questions are open, the others are closed. Users share
+    PASSWORD.
+
+    Returns:
+        dict: Ids of `questions`, `open_questions`, `users` and choices per question, and `usernames`
+    """
+    records = seeding.generate_records(questions, choices, users, votes, open_ratio=0.5, rng=rng)
+    seeding.seed(records, batch_size=batch_size)
+    User.objects.update(password=make_password(PASSWORD))
+    choice_ids = {}
+    for choice_id, question_id in Choice.objects.values_list('id', 'question'):
+        choice_ids.setdefault(question_id, []).append(choice_id)
+    return {
+        'questions': list(Question.objects.values_list('id', flat=True)),
+        'open_questions': list(Question.objects.open().values_list('id', flat=True)),
+        'choices': choice_ids,
+        'users': list(User.objects.values_list('id', flat=True)),
+        'usernames': list(User.objects.values_list('username', flat=True)),
+    }
+
+
+def _request(client: Client, endpoint: str, data: dict, rng: random.Random):
+    """Send one request to the endpoint and return the response."""
+    if endpoint == 'index':
+        return client.get(reverse('polls:index'))
+    if endpoint == 'login':
+        return client.post(reverse('login'), {'username': rng.choice(data['usernames']), 'password': PASSWORD})
+    if endpoint == 'signup':
+        username = f"bench_{rng.getrandbits(64):x}"
+        return client.post(reverse('signup'), {'username': username, 'password1': PASSWORD, 'password2': PASSWORD})
+    if endpoint == 'results':
+        return client.get(reverse('polls:results', args=(rng.choice(data['questions']),)))
+    question_id = rng.choice(data['open_questions'])
+    if endpoint == 'detail':
+        return client.get(reverse('polls:detail', args=(question_id,)))
+    choice_id = rng.choice(data['choices'][question_id])
+    return client.post(reverse('polls:vote', args=(question_id,)), {'choice': choice_id})
+
+
+def _worker(endpoint: str, data: dict, requests: int, seed_value: int) -> list:
+    """Send `requests` requests from one client and return (seconds, queries, ok) samples."""
+    rng = random.Random(seed_value)
+    client = Client(raise_request_exception=False)
+    if endpoint == 'vote':
+        client.force_login(User.objects.get(pk=rng.choice(data['users'])))
+    samples = []
+    try:
+        for _ in range(requests):
+            counter = QueryCounter()
+            start = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                response = _request(client, endpoint, data, rng)
+            # Failed logins and signups render their form again.
+            ok = response.status_code == 302 if endpoint in AUTH_ENDPOINTS else response.status_code < 400
+            samples.append((time.perf_counter() - start, counter.count, ok))
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+    return samples
+
+
+def run(data: dict, endpoints=ENDPOINTS, requests: int = 200, concurrency: int = 4) -> dict:
+    """Benchmark the endpoints with seeded `data`.
+
+    Args:
+        data (dict): Ids returned by seed()
+        endpoints (iterable): Names of endpoints to drive
+        requests (int): Number of requests per endpoint
+        concurrency (int): Number of concurrent clients (1 runs in the current thread)
+    Returns:
+        dict: Report per endpoint
+    """
+    report = {}
+    concurrency = max(min(concurrency, requests), 1)
+    # Every client shares one IP, which rate limits would throttle.
+    with override_settings(RATE_LIMIT_ENABLED=False):
+        for endpoint in endpoints:
+            per_worker = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+            start = time.perf_counter()
+            if concurrency == 1:
+                results = [_worker(endpoint, data, per_worker[0], 0)]
+            else:
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    futures = [executor.submit(_worker, endpoint, data, count, index)
+                               for index, count in enumerate(per_worker)]
+                    results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - start
+            samples = [sample for result in results for sample in result]
+            latencies = sorted(sample[0] * 1000 for sample in samples)
+            report[endpoint] = {
+                'requests': len(samples),
+                'errors': sum(1 for sample in samples if not sample[2]),
+                'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else None,
+                'latency_ms': {f'p{percent}': round(percentile(latencies, percent), 3) for percent in (50, 95, 99)},
+                'queries_per_request': round(sum(sample[1] for sample in samples) / len(samples), 2),
+            }
+    return report
+
+
+def _render_contexts(data: dict, request) -> dict:
+    """Return the template name and context of the question list and a results page."""
+    index = views.IndexView()
+    index.setup(request)
+    index.object_list = index.get_queryset()
+    results = views.ResultsView()
+    results.setup(request, pk=data['questions'][0])
+    results.object = results.get_object()
+    return {
+        'question_list': (index.list_template_name, index.get_context_data()),
+        'results': (results.template_name, results.get_context_data(object=results.object)),
+    }
+
+
+def _template_engine(cached_loaders: bool) -> DjangoTemplates:
+    """Return a template engine like the project's with or without cached loaders."""
+    options = settings.TEMPLATES[0]
+    loaders = settings.TEMPLATE_LOADERS
+    return DjangoTemplates({
+        'NAME': 'benchmark', 'DIRS': options['DIRS'], 'APP_DIRS': False,
+        'OPTIONS': {
+            **options['OPTIONS'],
+            'loaders': [('django.template.loaders.cached.Loader', loaders)] if cached_loaders else loaders,
+        },
+    })
+
+
+def render(data: dict, iterations: int = 200) -> dict:
+    """Time rendering of the question list and a results page with seeded `data`.
+
+    Each configuration of RENDER_CONFIGS loads and renders the templates
+    `iterations` times. Without fragment caching the {% cache %} tags use a
+    dummy cache.
+
+    Returns:
+        dict: Render latency percentiles per configuration and template
+    """
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    contexts = _render_contexts(data, request)
+    report = {}
+    for name, (cached_loaders, fragments) in RENDER_CONFIGS.items():
+        engine = _template_engine(cached_loaders)
+        caches = dict(settings.CACHES)
+        if not fragments:
+            caches['template_fragments'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        report[name] = {}
+        with override_settings(CACHES=caches):
+            for page, (template_name, context) in contexts.items():
+                latencies = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    engine.get_template(template_name).render(context, request)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                latencies.sort()
+                report[name][page] = {'latency_ms': {
+                    f'p{percent}': round(percentile(latencies, percent), 3) for percent in (50, 95, 99)
+                }}
+    return report
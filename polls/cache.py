@@ -0,0 +1,85 @@
+"""Read-through cache of question results.
+
+Results are cached per question version, which every vote bumps. A read
+that started before a vote can only fill the entry of the version it read,
+which later reads never ask for, so stale results are never served.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from mysite.routers import primary_reads
+
+from .models import Question
+
+RESULTS_KEY = 'polls:results:{}:{}'
+# Last cached version of a question, so invalidation can free its entry.
+RESULTS_VERSION_KEY = 'polls:results-version:{}'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_cache():
+    """Return the cache used for results."""
+    return caches[settings.POLLS_RESULTS_CACHE]
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_results(question: Question) -> dict:
+    """Return results of the question, reading them from the cache when possible.
+
+    Results of closed questions never change, so they are kept for
+    POLLS_CLOSED_RESULTS_CACHE_TIMEOUT seconds. Results of open questions are
+    kept for POLLS_RESULTS_CACHE_TIMEOUT seconds or until the next vote.
+    Missing results are counted on the default database, never the replica.
+    `question` must carry its current version.
+    """
+    cache = get_cache()
+    key = RESULTS_KEY.format(question.pk, question.version)
+    results = cache.get(key)
+    if results is not None:
+        _count('hits')
+        return results
+    _count('misses')
+    with primary_reads():
+        results = question.get_results()
+    if question.is_published() and not question.can_vote():
+        timeout = settings.POLLS_CLOSED_RESULTS_CACHE_TIMEOUT
+    else:
+        timeout = settings.POLLS_RESULTS_CACHE_TIMEOUT
+    cache.set_many({key: results, RESULTS_VERSION_KEY.format(question.pk): question.version}, timeout)
+    return results
+
+
+def invalidate_results(question_id: int):
+    """Free the cached results of the question's last cached version.
+
+    Entries of other versions are never read again and expire on their own.
+    """
+    cache = get_cache()
+    version_key = RESULTS_VERSION_KEY.format(question_id)
+    version = cache.get(version_key)
+    if version is not None:
+        cache.delete_many([RESULTS_KEY.format(question_id, version), version_key])
+
+
+def cache_stats() -> dict:
+    """Return hit and miss counters of this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0
+    return stats
+
+
+def reset_cache_stats():
+    """Reset hit and miss counters of this process."""
+    with _stats_lock:
+        _stats['hits'] = 0
+        _stats['misses'] = 0
@@ -0,0 +1,92 @@
+"""Streaming export of polls data.
+
+export_records() yields the records read by polls.seeding: questions,
+choices with their vote counts and, with `ballots`, users and votes,
+including archived ones. Users carry their password hashes unless
+`passwords` is False, which the HTTP export uses. Rows are read with QuerySet.iterator() so memory
+use does not grow with the number of votes. Records are written as JSON
+Lines or as the CSV files of seeding.read_csv(), which `import_polls` and
+`seed_polls` load back with bulk inserts.
+"""
+import csv
+import datetime
+import json
+
+from django.contrib.auth.models import User
+
+from . import archive
+from .models import Choice, Question, Vote, VoteArchive
+from .seeding import MODELS, SEED_PASSWORD
+
+FIELDS = {
+    'question': ('id', 'question_text', 'pub_date', 'end_date'),
+    'choice': ('id', 'question', 'choice_text', 'votes'),
+    # Password hashes, so imported users keep their logins.
+    'user': ('id', 'username', 'password'),
+    'vote': ('voter', 'question', 'choice'),
+}
+
+
+def _rows(model: str, chunk_size: int):
+    """Yield the rows of a model as tuples of FIELDS."""
+    if model == 'question':
+        rows = Question.objects.values_list(*FIELDS['question'])
+    elif model == 'choice':
+        rows = Choice.objects.values_list('id', 'question_id', 'choice_text', 'votes')
+    elif model == 'user':
+        rows = User.objects.values_list(*FIELDS['user'])
+    else:
+        rows = Vote.objects.values_list('voter_id', 'question_id', 'choice_id')
+    yield from rows.order_by('id').iterator(chunk_size=chunk_size)
+    if model == 'vote':
+        # Archives are large blobs, read them one at a time.
+        for question_id, ballots in VoteArchive.objects.values_list('question_id', 'ballots').iterator(chunk_size=1):
+            for ballot in archive.decompress(ballots):
+                yield ballot['voter'], question_id, ballot['choice']
+
+
+def export_models(ballots: bool = False):
+    """Return the exported models in loading order."""
+    return MODELS if ballots else ('question', 'choice')
+
+
+def export_records(model: str = None, ballots: bool = False, chunk_size: int = 2000, passwords: bool = True):
+    """Yield records of one model or, by default, of every exported model.
+
+    Without `passwords`, users get an unusable password instead of their hash.
+    """
+    for name in (model,) if model else export_models(ballots):
+        for row in _rows(name, chunk_size):
+            record = {'model': name, **dict(zip(FIELDS[name], row))}
+            if name == 'user' and not passwords:
+                record['password'] = SEED_PASSWORD
+            yield record
+
+
+def _isoformat(value) -> str:
+    # Unlike DjangoJSONEncoder, keep microseconds so dates survive a round trip.
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def jsonl_lines(records):
+    """Yield records as JSON Lines."""
+    for record in records:
+        yield json.dumps(record, default=_isoformat) + "\n"
+
+
+class Echo:
+    """File-like object that returns what is written, for streaming csv.writer rows."""
+
+    def write(self, value):
+        """Return the written value."""
+        return value
+
+
+def csv_lines(model: str, records):
+    """Yield a header and one CSV line per record of `model`, as read by seeding.read_csv()."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS[model])
+    for record in records:
+        yield writer.writerow([record[field] for field in FIELDS[model]])
@@ -0,0 +1,115 @@
+"""Page and HTTP caching that follows the lifecycle of questions.
+
+Pages only change when a question is published or closes, or when an
+editor changes a question. Cached pages therefore expire at the next
+`pub_date` or `end_date` boundary instead of after a fixed time, and
+question signals drop them when questions are edited.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from mysite.routers import primary_reads
+
+from .cache import get_cache
+from .models import Question
+
+TRANSITION_KEY = 'polls:next-transition'
+GENERATION_KEY = 'polls:catalog-generation'
+INDEX_FRAGMENT_KEY = 'polls:fragment:index:{}:{}:{}:{}:{}'
+RESULTS_PAGE_KEY = 'polls:page:results:{}'
+# Cached when no question will be published or close.
+NO_TRANSITION = 'none'
+# Name of the {% cache %} fragment of a question in the question list, keyed
+# by its `modified` time so edits are seen by every process.
+ITEM_FRAGMENT = 'poll-item'
+
+
+def next_transition(now: datetime.datetime = None):
+    """Return the next time a question is published or closes, or None."""
+    now = now or timezone.now()
+    cache = get_cache()
+    transition = cache.get(TRANSITION_KEY)
+    if transition is None or (transition != NO_TRANSITION and transition <= now):
+        with primary_reads():
+            upcoming = [
+                Question.objects.filter(pub_date__gt=now).order_by('pub_date')
+                .values_list('pub_date', flat=True).first(),
+                Question.objects.filter(end_date__gte=now).order_by('end_date')
+                .values_list('end_date', flat=True).first(),
+            ]
+        upcoming = [moment for moment in upcoming if moment is not None]
+        transition = min(upcoming) if upcoming else NO_TRANSITION
+        cache.set(TRANSITION_KEY, transition, page_timeout(transition, now))
+    return None if transition == NO_TRANSITION else transition
+
+
+def page_timeout(transition, now: datetime.datetime = None) -> int:
+    """Return seconds until `transition`, capped at POLLS_PAGE_CACHE_TIMEOUT."""
+    if transition is None or transition == NO_TRANSITION:
+        return settings.POLLS_PAGE_CACHE_TIMEOUT
+    seconds = int((transition - (now or timezone.now())).total_seconds())
+    return max(min(seconds, settings.POLLS_PAGE_CACHE_TIMEOUT), 0)
+
+
+def catalog_changed():
+    """Drop lifecycle-dependent cache entries after a question changed."""
+    cache = get_cache()
+    cache.delete(TRANSITION_KEY)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def index_fragment_key(state: str, before, after) -> str:
+    """Return the cache key of a question list fragment.
+
+    `before` and `after` are decoded (pub_date, id) cursors or None. The key
+    includes a generation bumped on question changes in this cache and the
+    latest question id, which catches questions created by other processes.
+    """
+    generation = get_cache().get(GENERATION_KEY, 0)
+    latest = Question.objects.aggregate(latest=Max('id'))['latest']
+    before, after = ('{}_{}'.format(cursor[0].isoformat(), cursor[1]) if cursor else '' for cursor in (before, after))
+    return INDEX_FRAGMENT_KEY.format(generation, latest, state, before, after)
+
+
+def get_results_page(question_id: int):
+    """Return the cached content of a closed question's results page or None."""
+    return get_cache().get(RESULTS_PAGE_KEY.format(question_id))
+
+
+def set_results_page(question_id: int, content: bytes):
+    """Cache the content of a closed question's results page."""
+    get_cache().set(RESULTS_PAGE_KEY.format(question_id), content, settings.POLLS_CLOSED_PAGE_CACHE_TIMEOUT)
+
+
+def invalidate_results_page(question_id: int):
+    """Drop the cached results page of a question."""
+    get_cache().delete(RESULTS_PAGE_KEY.format(question_id))
+
+
+def fragment_cache():
+    """Return the cache used by the {% cache %} template tag."""
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def patch_shared_cache(response, max_age: int):
+    """Let browsers and proxies share the response for `max_age` seconds."""
+    patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def patch_private_cache(response):
+    """Keep the response out of shared caches."""
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,148 @@
+"""Buffered ingestion of votes.
+
+When POLLS_VOTE_INGESTION is "buffered", vote() hands validated ballots to a
+VoteBuffer instead of writing them. A background thread writes the buffered
+ballots with Vote.objects.cast_many() every POLLS_VOTE_FLUSH_INTERVAL seconds
+or as soon as POLLS_VOTE_BATCH_SIZE ballots are waiting. Later ballots of the
+same voter on the same question replace earlier ones (last write wins).
+Ballots whose voter or choice was deleted while buffered are dropped.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+
+from .cache import invalidate_results
+from .http_cache import invalidate_results_page
+from .live import broker
+from .models import Choice, Vote
+
+logger = logging.getLogger("polls")
+
+
+class VoteBuffer:
+    """In-process buffer of ballots flushed to the database in batches."""
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.5, limit: int = 10000):
+        """Create an empty buffer.
+
+        Args:
+            batch_size (int): Number of ballots that triggers an early flush
+            flush_interval (float): Seconds between two flushes
+            limit (int): Maximum number of pending ballots
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.limit = limit
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        """Return the number of pending ballots."""
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, voter_id: int, question_id: int, choice_id: int) -> bool:
+        """Add a ballot to the buffer.
+
+        Returns:
+            bool: False if the buffer is full or stopped and the caller must write the vote itself
+        """
+        with self._lock:
+            key = (voter_id, question_id)
+            if self._stopped.is_set() or (key not in self._pending and len(self._pending) >= self.limit):
+                return False
+            self._pending[key] = choice_id
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """Write pending ballots to the database.
+
+        Returns:
+            int: Number of written ballots
+        """
+        with self._flush_lock:
+            with self._lock:
+                ballots, self._pending = self._pending, {}
+            ballots = self._valid(ballots)
+            if not ballots:
+                return 0
+            try:
+                question_ids = Vote.objects.cast_many(ballots, batch_size=self.batch_size)
+            except Exception:
+                # Put the ballots back unless newer ones arrived meanwhile.
+                with self._lock:
+                    self._pending = {**ballots, **self._pending}
+                raise
+            for question_id in question_ids:
+                invalidate_results(question_id)
+                invalidate_results_page(question_id)
+                broker.publish(question_id)
+            return len(ballots)
+
+    @staticmethod
+    def _valid(ballots: dict) -> dict:
+        """Return the ballots whose voter and choice still exist, logging the others."""
+        voter_ids = set(User.objects.filter(pk__in={voter_id for voter_id, _ in ballots}).values_list('id', flat=True))
+        choices = set(Choice.objects.filter(pk__in=set(ballots.values())).values_list('id', 'question_id'))
+        valid = {key: choice_id for key, choice_id in ballots.items()
+                 if key[0] in voter_ids and (choice_id, key[1]) in choices}
+        for (voter_id, question_id), choice_id in ballots.items():
+            if (voter_id, question_id) not in valid:
+                logger.warning("Dropped buffered vote of user %s for choice %s of question %s, one was deleted.",
+                               voter_id, choice_id, question_id)
+        return valid
+
+    def start(self):
+        """Start the background flusher."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="vote-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop accepting ballots, stop the flusher and write what is left."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered votes.")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer() -> VoteBuffer:
+    """Return the buffer of this process, starting it on first use."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = VoteBuffer(
+                batch_size=settings.POLLS_VOTE_BATCH_SIZE,
+                flush_interval=settings.POLLS_VOTE_FLUSH_INTERVAL,
+                limit=settings.POLLS_VOTE_BUFFER_LIMIT,
+            )
+            _buffer.start()
+            atexit.register(_buffer.stop)
+        return _buffer
@@ -0,0 +1,97 @@
+"""Finalization of questions whose voting ended.
+
+When a question passes its `end_date`, finalize() counts its Vote rows once
+and saves the counts as FinalResult rows, which the results of the question
+are read from afterwards. With POLLS_WARM_CLOSED_RESULTS, the results cache
+and the closed results page are then warmed, so reads of closed questions do
+not touch the Vote table. The `finalize_polls` management command runs
+finalize_due() once or on a schedule that wakes up at the next `end_date`.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import archive, http_cache
+from .cache import get_results, invalidate_results
+from .models import Choice, FinalResult, Question
+from .views import render_results_page
+
+logger = logging.getLogger("polls")
+
+
+def finalize(question_id: int, now: datetime.datetime = None) -> bool:
+    """Freeze the final counts of a closed question.
+
+    Final counts left over from a save that cleared `finalized_at` are
+    replaced, with the archived votes moved back to count them again.
+
+    Returns:
+        bool: False if the question is open or was already finalized
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        question = (Question.objects.select_for_update().closed(now)
+                    .filter(pk=question_id, finalized_at__isnull=True).first())
+        if question is None:
+            return False
+        archive.restore(question.pk)
+        FinalResult.objects.filter(question=question).delete()
+        counts = Choice.objects.filter(question=question).annotate(actual=Count('vote')).values_list('id', 'actual')
+        FinalResult.objects.bulk_create([
+            FinalResult(question=question, choice_id=choice_id, votes=votes) for choice_id, votes in counts
+        ])
+        Question.objects.filter(pk=question.pk).update(finalized_at=now, version=F('version') + 1, modified=now)
+        transaction.on_commit(lambda: warm(question.pk))
+    logger.info("Finalized results of question %s.", question.pk)
+    return True
+
+
+def finalize_due(now: datetime.datetime = None) -> list:
+    """Finalize every closed question that is not finalized yet.
+
+    Returns:
+        list: Ids of the finalized questions
+    """
+    now = now or timezone.now()
+    due = Question.objects.closed(now).filter(finalized_at__isnull=True).order_by('end_date')
+    return [question_id for question_id in due.values_list('id', flat=True) if finalize(question_id, now)]
+
+
+def next_closing(now: datetime.datetime = None):
+    """Return the next `end_date` of a question to finalize, or None."""
+    now = now or timezone.now()
+    return (Question.objects.filter(finalized_at__isnull=True, end_date__gte=now)
+            .order_by('end_date').values_list('end_date', flat=True).first())
+
+
+def reopen(question: Question):
+    """Drop the final counts of a finalized question whose voting was extended.
+
+    Archived votes are moved back so voters keep their single vote.
+    """
+    with transaction.atomic():
+        archive.restore(question.pk)
+        FinalResult.objects.filter(question=question).delete()
+        Question.objects.filter(pk=question.pk).update(finalized_at=None, version=F('version') + 1)
+    question.finalized_at = None
+    invalidate_results(question.pk)
+    http_cache.invalidate_results_page(question.pk)
+
+
+def warm(question_id: int):
+    """Cache the final results and the results page of a finalized question.
+
+    Only caches shared with the web workers are warmed, see
+    POLLS_WARM_CLOSED_RESULTS. Otherwise the stale copies are only dropped.
+    """
+    invalidate_results(question_id)
+    http_cache.invalidate_results_page(question_id)
+    if not settings.POLLS_WARM_CLOSED_RESULTS:
+        return
+    question = Question.objects.get(pk=question_id)
+    get_results(question)
+    http_cache.set_results_page(question_id, render_results_page(question))
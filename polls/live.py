@@ -0,0 +1,87 @@
+"""Live results pushed to browsers with Server-Sent Events.
+
+vote() publishes the id of each question that received a vote to `broker`.
+Every open results stream waits on the broker and, when the question
+changed, sends the current results read through the results cache. A stream
+sends at most one update per POLLS_LIVE_INTERVAL seconds, so a burst of votes
+costs one push.
+
+Streams are off unless POLLS_LIVE_RESULTS is set, since each one holds a
+worker thread. The broker lives in the process memory, so streams only see
+votes handled by the same process. Streams are served by the sync views
+only: under ASGI, Django 3.2 iterates streaming responses in the event
+loop, where waiting on the broker would block every other request.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+
+from .cache import get_results
+from .models import Question
+
+
+class ResultsBroker:
+    """In-process publish/subscribe of result versions per question."""
+
+    def __init__(self):
+        """Start with every question at version 0."""
+        self._versions = {}
+        self._condition = threading.Condition()
+
+    def publish(self, question_id: int):
+        """Signal that results of the question changed."""
+        with self._condition:
+            self._versions[question_id] = self._versions.get(question_id, 0) + 1
+            self._condition.notify_all()
+
+    def version(self, question_id: int) -> int:
+        """Return the current version of the question."""
+        with self._condition:
+            return self._versions.get(question_id, 0)
+
+    def wait(self, question_id: int, version: int, timeout: float) -> int:
+        """Wait until the question is past `version` or `timeout` seconds passed.
+
+        Returns:
+            int: The current version of the question
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._versions.get(question_id, 0) != version, timeout)
+            return self._versions.get(question_id, 0)
+
+
+broker = ResultsBroker()
+
+
+def event(name: str, data) -> str:
+    """Return a Server-Sent Event."""
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_results(question: Question):
+    """Yield result events of the question as votes arrive.
+
+    A closed question gets a single event. An open one is streamed for
+    POLLS_LIVE_MAX_DURATION seconds, then the browser reconnects.
+    """
+    version = broker.version(question.id)
+    yield f"retry: {settings.POLLS_LIVE_RETRY}\n\n"
+    yield event('results', get_results(question))
+    if not question.can_vote():
+        return
+    deadline = time.monotonic() + settings.POLLS_LIVE_MAX_DURATION
+    while time.monotonic() < deadline:
+        timeout = min(settings.POLLS_LIVE_KEEPALIVE, max(deadline - time.monotonic(), 0))
+        current = broker.wait(question.id, version, timeout)
+        if current == version:
+            # Comments keep proxies from closing an idle connection.
+            yield ": keepalive\n\n"
+            continue
+        version = current
+        # Results are cached per question version, which the vote bumped.
+        question.refresh_from_db(fields=['version'])
+        yield event('results', get_results(question))
+        # Coalesce bursts of votes into one push per interval.
+        time.sleep(settings.POLLS_LIVE_INTERVAL)
@@ -0,0 +1,34 @@
+"""Move votes of finalized questions out of the Vote table."""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls import archive
+from polls.models import Question
+
+
+class Command(BaseCommand):
+    """Archive votes of finalized questions or print the ballots of a question."""
+
+    help = ("Move the votes of finalized questions (all of them, or the given ids) into compressed archives. "
+            "With --audit, print the ballots of a question as JSON Lines instead.")
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument('question_ids', nargs='*', type=int, help="Questions to archive (default: all due).")
+        parser.add_argument('--audit', type=int, metavar='QUESTION_ID',
+                            help="Print the ballots of this question, archived or not, as JSON Lines.")
+
+    def handle(self, *args, **options):
+        """Archive votes or print ballots."""
+        if options['audit'] is not None:
+            if not Question.objects.filter(pk=options['audit']).exists():
+                raise CommandError(f"Question {options['audit']} does not exist.")
+            for ballot in archive.read_ballots(options['audit']):
+                self.stdout.write(json.dumps(ballot))
+            return
+        if options['question_ids']:
+            archived = {question_id: archive.archive(question_id) for question_id in options['question_ids']}
+        else:
+            archived = archive.archive_due()
+        self.stdout.write(f"Archived {sum(archived.values())} vote(s) of {len(archived)} question(s).")
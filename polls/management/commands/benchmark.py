@@ -0,0 +1,96 @@
+"""Benchmark the poll endpoints against a throwaway database."""
+import json
+import logging
+import os
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from polls import benchmark
+from polls.cache import get_cache
+
+
+class Command(BaseCommand):
+    """Seed a throwaway database, load test the poll endpoints and report as JSON."""
+
+    help = ("Seed a throwaway database, drive the index, detail, results and vote endpoints "
+            "and report throughput, latency percentiles and queries per request.")
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument('--questions', type=int, default=100, help="Number of questions to seed.")
+        parser.add_argument('--choices', type=int, default=4, help="Number of choices per question.")
+        parser.add_argument('--users', type=int, default=100, help="Number of users to seed.")
+        parser.add_argument('--votes', type=int, default=1000, help="Number of votes to seed.")
+        parser.add_argument('--requests', type=int, default=200, help="Number of requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=4, help="Number of concurrent clients.")
+        parser.add_argument('--endpoints', nargs='+', choices=benchmark.ENDPOINTS + benchmark.AUTH_ENDPOINTS,
+                            default=benchmark.ENDPOINTS,
+                            help="Endpoints to benchmark, login and signup are only run when listed.")
+        parser.add_argument('--render', action='store_true',
+                            help="Also compare template render times with and without cached loaders "
+                                 "and fragment caching.")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        """Run the benchmark."""
+        if options['questions'] < 1 or options['users'] < 1 or options['choices'] < 1:
+            raise CommandError("At least one question, choice and user are required.")
+        if options['verbosity'] < 2:
+            # Per-request log lines would dominate the run.
+            for name in ("mysite", "polls", "audit"):
+                logging.getLogger(name).setLevel(logging.WARNING)
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # A file database behaves like production under concurrent clients.
+                connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                get_cache().clear()
+                data = benchmark.seed(
+                    questions=options['questions'], choices=options['choices'],
+                    users=options['users'], votes=options['votes'],
+                )
+                results = benchmark.run(
+                    data, endpoints=options['endpoints'],
+                    requests=options['requests'], concurrency=options['concurrency'],
+                )
+                render_results = benchmark.render(data, iterations=options['requests']) if options['render'] else None
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        report = {
+            'commit': self.git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'config': {key: options[key] for key in (
+                'questions', 'choices', 'users', 'votes', 'requests', 'concurrency')},
+            'auth': {'password_hasher': settings.PASSWORD_HASHERS[0], 'session_engine': settings.SESSION_ENGINE},
+            'endpoints': results,
+        }
+        if render_results is not None:
+            report['render'] = render_results
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
+
+    @staticmethod
+    def git_commit():
+        """Return the current git commit or None outside a git checkout."""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,43 @@
+"""Export questions, choices and optionally ballots."""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls import export
+from polls.seeding import CSV_FILES
+
+
+class Command(BaseCommand):
+    """Stream polls data to a JSONL file or a directory of CSV files."""
+
+    help = ("Export questions and choices with their vote counts, and with --ballots users and votes, "
+            "in the format read by import_polls and seed_polls.")
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument('output', help="JSONL file ('-' for stdout) or, with --format csv, a directory.")
+        parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="Output format.")
+        parser.add_argument('--ballots', action='store_true', help="Also export users and votes.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Number of rows fetched at a time.")
+
+    def handle(self, *args, **options):
+        """Write the records."""
+        output, chunk_size = options['output'], options['chunk_size']
+        models = export.export_models(options['ballots'])
+        if options['format'] == 'csv':
+            if output == '-':
+                raise CommandError("CSV exports are written to a directory.")
+            os.makedirs(output, exist_ok=True)
+            for model in models:
+                with open(os.path.join(output, CSV_FILES[model]), 'w', newline='') as file:
+                    file.writelines(export.csv_lines(model, export.export_records(model, chunk_size=chunk_size)))
+        else:
+            records = export.export_records(ballots=options['ballots'], chunk_size=chunk_size)
+            if output == '-':
+                for line in export.jsonl_lines(records):
+                    self.stdout.write(line, ending='')
+            else:
+                with open(output, 'w') as file:
+                    file.writelines(export.jsonl_lines(records))
+        if output != '-':
+            self.stdout.write(self.style.SUCCESS(f"Exported {', '.join(models)} records to {output}."))
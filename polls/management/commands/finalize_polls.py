@@ -0,0 +1,36 @@
+"""Finalize the results of questions whose voting ended."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from polls.lifecycle import finalize_due, next_closing
+
+
+class Command(BaseCommand):
+    """Freeze final counts of closed questions, once or whenever a question closes."""
+
+    help = ("Save the final counts of closed questions and warm their cached results. "
+            "With --watch, keep running and wake up when the next question closes.")
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument('--watch', action='store_true', help="Keep finalizing questions as they close.")
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help="Longest sleep in seconds with --watch, to notice new or edited questions.")
+
+    def handle(self, *args, **options):
+        """Finalize due questions, then wait for the next one with --watch."""
+        while True:
+            finalized = finalize_due()
+            self.stdout.write(f"Finalized {len(finalized)} question(s).")
+            if not options['watch']:
+                break
+            closing = next_closing()
+            delay = options['interval']
+            if closing is not None:
+                delay = min(delay, (closing - timezone.now()).total_seconds())
+            # Question.end_date is inclusive, so finalize just after it.
+            time.sleep(max(delay, 0) + 0.001)
+            close_old_connections()
@@ -0,0 +1,17 @@
+"""Bulk import polls data written by export_polls."""
+from .seed_polls import Command as SeedCommand
+
+
+class Command(SeedCommand):
+    """Import a JSONL file or a directory of CSV files with bulk inserts."""
+
+    help = ("Import polls data written by export_polls: a JSONL file of records with a 'model' key or a "
+            "directory with questions.csv, choices.csv, users.csv and votes.csv. Choice counts are kept "
+            "unless votes are imported too.")
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument('source', help="JSONL file or directory of CSV files to import.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Number of rows per bulk insert.")
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help="Drop secondary indexes during the load and rebuild them afterwards.")
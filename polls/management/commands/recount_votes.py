@@ -0,0 +1,42 @@
+"""Rebuild the denormalized vote counters of choices."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from polls.models import Choice
+
+
+class Command(BaseCommand):
+    """Recount votes of every choice not archived from the Vote table and report drift."""
+
+    help = "Rebuild Choice.votes from the Vote table and report choices whose counter drifted."
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report drift without fixing the counters.",
+        )
+
+    def handle(self, *args, **options):
+        """Compare stored counters with actual vote counts and fix them."""
+        with transaction.atomic():
+            # Votes of archived questions are no longer in the Vote table.
+            choices = Choice.objects.filter(question__vote_archive__isnull=True).annotate(actual=Count('vote'))
+            drifted = []
+            for choice in choices:
+                if choice.votes != choice.actual:
+                    self.stdout.write(
+                        f"Choice {choice.pk} ({choice.choice_text}): stored {choice.votes}, actual {choice.actual}"
+                    )
+                    choice.votes = choice.actual
+                    drifted.append(choice)
+            if drifted and not options['check']:
+                Choice.objects.bulk_update(drifted, ['votes'], batch_size=500)
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All vote counters are consistent."))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} vote counter(s) drifted."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drifted)} vote counter(s)."))
@@ -0,0 +1,60 @@
+"""Bulk load questions, choices, users and votes."""
+import os
+import random
+import time
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from polls import seeding
+
+
+class Command(BaseCommand):
+    """Generate synthetic poll data or import it from JSONL or CSV files."""
+
+    help = ("Bulk load polls data. Without a source, generate synthetic rows. The source is a JSONL "
+            "file of records with a 'model' key or a directory with questions.csv, choices.csv, "
+            "users.csv and votes.csv.")
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument('source', nargs='?', help="JSONL file or directory of CSV files to import.")
+        parser.add_argument('--questions', type=int, default=1000, help="Number of questions to generate.")
+        parser.add_argument('--choices', type=int, default=4, help="Number of choices per generated question.")
+        parser.add_argument('--users', type=int, default=1000, help="Number of users to generate.")
+        parser.add_argument('--votes', type=int, default=10000, help="Number of votes to generate.")
+        parser.add_argument('--open-ratio', type=float, default=0.1, help="Share of generated questions still open.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed of generated data.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Number of rows per bulk insert.")
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help="Drop secondary indexes during the load and rebuild them afterwards.")
+
+    def handle(self, *args, **options):
+        """Load the records."""
+        source = options['source']
+        if source is None:
+            records = seeding.generate_records(
+                options['questions'], options['choices'], options['users'], options['votes'],
+                open_ratio=options['open_ratio'], rng=random.Random(options['seed']),
+            )
+        elif os.path.isdir(source):
+            records = seeding.read_csv(source)
+        elif os.path.isfile(source):
+            records = seeding.read_jsonl(source)
+        else:
+            raise CommandError(f"{source} does not exist.")
+
+        start = time.perf_counter()
+        try:
+            counts = seeding.seed(records, batch_size=options['batch_size'], drop_indexes=options['drop_indexes'])
+        except (KeyError, ValueError) as error:
+            raise CommandError(f"Invalid record: {error}")
+        except ObjectDoesNotExist as error:
+            raise CommandError(f"Missing related row: {error} Nothing was loaded.")
+        except IntegrityError as error:
+            raise CommandError(f"Records conflict with rows already in the database ({error}). "
+                               "Nothing was loaded, import into an empty database.")
+        elapsed = time.perf_counter() - start
+        summary = ", ".join(f"{count} {model}(s)" for model, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Loaded {summary} in {elapsed:.1f}s."))
@@ -0,0 +1,52 @@
+"""Copy the default SQLite database to its replica."""
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """Refresh the SQLite replica with the online backup API."""
+
+    help = ("Copy the default SQLite database to the replica (DB_REPLICA_NAME) with the online backup API, "
+            "once or every --interval seconds. Other databases should use their own replication.")
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument('--output', help="Copy to this file instead of the configured replica.")
+        parser.add_argument('--interval', type=float, help="Keep copying every INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        """Copy the database once or repeatedly."""
+        source = connections[DEFAULT_DB_ALIAS]
+        target = options['output']
+        if target is None:
+            if settings.DATABASE_REPLICA is None:
+                raise CommandError("No replica is configured, set DB_REPLICA_NAME or pass --output.")
+            replica = connections[settings.DATABASE_REPLICA]
+            if replica.vendor != 'sqlite':
+                raise CommandError("Only SQLite replicas can be synced, use the database's replication.")
+            target = replica.settings_dict['NAME']
+        if source.vendor != 'sqlite':
+            raise CommandError("Only SQLite databases can be synced, use the database's replication.")
+
+        while True:
+            start = time.perf_counter()
+            self.sync(source, target)
+            self.stdout.write(f"Copied to {target} in {time.perf_counter() - start:.3f}s.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    @staticmethod
+    def sync(source, target: str):
+        """Copy the source connection's database to the `target` file."""
+        source.ensure_connection()
+        destination = sqlite3.connect(target)
+        try:
+            # Under WAL the source is read like any reader, so writers go on.
+            source.connection.backup(destination)
+        finally:
+            destination.close()
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.6 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_votes(apps, schema_editor):
+    """Fill the vote counter of every choice from the Vote table."""
+    Choice = apps.get_model('polls', 'Choice')
+    choices = list(Choice.objects.annotate(vote_count=Count('vote')))
+    for choice in choices:
+        choice.votes = choice.vote_count
+    Choice.objects.bulk_update(choices, ['votes'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_auto_20211025_1612'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='votes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_votes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.6 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_question(apps, schema_editor):
+    """Copy the question of each vote from its choice and drop duplicate votes.
+
+    Only the latest vote of a user on a question is kept, then the vote
+    counters of the choices are rebuilt.
+    """
+    Vote = apps.get_model('polls', 'Vote')
+    Choice = apps.get_model('polls', 'Choice')
+    Vote.objects.update(
+        question_id=Subquery(Choice.objects.filter(pk=OuterRef('choice_id')).values('question_id')[:1])
+    )
+    latest = (Vote.objects.values('voter_id', 'question_id')
+              .annotate(latest=Max('id'), count=Count('id'))
+              .filter(count__gt=1))
+    for row in latest:
+        (Vote.objects.filter(voter_id=row['voter_id'], question_id=row['question_id'])
+         .exclude(pk=row['latest']).delete())
+    choices = list(Choice.objects.annotate(vote_count=Count('vote')))
+    for choice in choices:
+        choice.votes = choice.vote_count
+    Choice.objects.bulk_update(choices, ['votes'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('polls', '0005_choice_votes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='question',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='polls.question'),
+        ),
+        migrations.RunPython(fill_question, migrations.RunPython.noop),
+    ]
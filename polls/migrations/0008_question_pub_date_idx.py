@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-18 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_vote_unique_vote_per_question'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['pub_date'], name='polls_question_pub_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-18 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0009_question_pub_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-18 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0010_question_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['end_date'], name='polls_question_end_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.6 on 2026-10-18 05:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0011_question_end_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='FinalResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('votes', models.PositiveIntegerField()),
+                ('choice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='final_result', to='polls.choice')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_results', to='polls.question')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-18 05:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0012_question_finalized_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteArchive',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='vote_archive', serialize=False, to='polls.question')),
+                ('ballots', models.BinaryField()),
+                ('count', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_SQL = [
+    "CREATE VIRTUAL TABLE polls_question_fts USING fts5(question_text, content='polls_question', content_rowid='id')",
+    "CREATE TRIGGER polls_question_fts_insert AFTER INSERT ON polls_question BEGIN "
+    "INSERT INTO polls_question_fts(rowid, question_text) VALUES (new.id, new.question_text); END",
+    "CREATE TRIGGER polls_question_fts_delete AFTER DELETE ON polls_question BEGIN "
+    "INSERT INTO polls_question_fts(polls_question_fts, rowid, question_text) "
+    "VALUES ('delete', old.id, old.question_text); END",
+    "CREATE TRIGGER polls_question_fts_update AFTER UPDATE OF question_text ON polls_question BEGIN "
+    "INSERT INTO polls_question_fts(polls_question_fts, rowid, question_text) "
+    "VALUES ('delete', old.id, old.question_text); "
+    "INSERT INTO polls_question_fts(rowid, question_text) VALUES (new.id, new.question_text); END",
+    "INSERT INTO polls_question_fts(polls_question_fts) VALUES ('rebuild')",
+]
+
+
+def create_fts(apps, schema_editor):
+    """Index question texts with FTS5 on SQLite builds that include it."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(FTS_SQL[0])
+    except OperationalError:
+        # SQLite was built without FTS5, the admin falls back to LIKE.
+        return
+    for sql in FTS_SQL[1:]:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for trigger in ('insert', 'delete', 'update'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS polls_question_fts_{trigger}")
+    schema_editor.execute("DROP TABLE IF EXISTS polls_question_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0013_votearchive'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
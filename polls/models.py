@@ -1,11 +1,52 @@
 """Models for the poll application."""
 import datetime
-from django.db import models
-from django.contrib import admin
+from collections import Counter
+from django.db import IntegrityError, models, transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q, Sum, Window
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 
+class QuestionQuerySet(models.QuerySet):
+    """Questions filtered and annotated by their state at a moment.
+
+    Every method takes an optional `now` so a request can evaluate all its
+    queries at the same moment.
+    """
+
+    def published(self, now: datetime.datetime = None):
+        """Return questions published at `now`."""
+        return self.filter(pub_date__lte=now or timezone.now())
+
+    def open(self, now: datetime.datetime = None):
+        """Return published questions accepting votes at `now`."""
+        now = now or timezone.now()
+        return self.published(now).filter(end_date__gte=now)
+
+    def closed(self, now: datetime.datetime = None):
+        """Return published questions whose voting ended before `now`."""
+        now = now or timezone.now()
+        return self.published(now).filter(end_date__lt=now)
+
+    def in_state(self, state: str, now: datetime.datetime = None):
+        """Return "open", "closed" or otherwise all published questions at `now`."""
+        if state == 'open':
+            return self.open(now)
+        if state == 'closed':
+            return self.closed(now)
+        return self.published(now)
+
+    def with_state(self, now: datetime.datetime = None):
+        """Annotate `is_open` and `published_recently` at `now`, like can_vote() and was_published_recently()."""
+        now = now or timezone.now()
+        return self.annotate(
+            is_open=ExpressionWrapper(Q(pub_date__lte=now, end_date__gte=now), output_field=BooleanField()),
+            published_recently=ExpressionWrapper(
+                Q(pub_date__gte=now - datetime.timedelta(days=1), pub_date__lte=now), output_field=BooleanField()
+            ),
+        )
+
+
 # Create your models here.
 class Question(models.Model):
     """Question of the poll."""
@@ -13,59 +54,237 @@ class Question(models.Model):
     question_text = models.CharField(max_length=200)
     pub_date = models.DateTimeField('date published')
     end_date = models.DateTimeField('end date')
+    # Bumped by every vote and choice change, used with `modified` to validate cached copies.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+    # Set when the final counts were saved as FinalResult rows, see polls.lifecycle.
+    finalized_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = QuestionQuerySet.as_manager()
+
+    class Meta:
+        """Index the dates used to list questions and find their next transition."""
+
+        indexes = [
+            models.Index(fields=['pub_date', 'id'], name='polls_question_pub_id_idx'),
+            models.Index(fields=['end_date'], name='polls_question_end_date_idx'),
+        ]
 
     def __str__(self):
         """Return question text as string."""
         return self.question_text
 
-    @admin.display(
-        boolean=True,
-        ordering='pub_date',
-        description='Published recently?'
-    )
-    def was_published_recently(self):
+    def was_published_recently(self, now: datetime.datetime = None):
         """Return true is the question is published less than 1 day from now."""
-        now = timezone.now()
+        now = now or timezone.now()
         return now - datetime.timedelta(days=1) <= self.pub_date <= now
 
-    def is_published(self):
+    def is_published(self, now: datetime.datetime = None):
         """Return true if the question is published."""
-        now = timezone.now()
+        now = now or timezone.now()
         return now >= self.pub_date
 
-    def can_vote(self):
-        """Return true if the question in the voting duration."""
-        now = timezone.now()
+    def can_vote(self, now: datetime.datetime = None):
+        """Return true if the question in the voting duration.
+
+        Lists should use the `is_open` annotation of
+        QuestionQuerySet.with_state() instead.
+        """
+        now = now or timezone.now()
         return self.pub_date <= now <= self.end_date
 
+    def get_results(self) -> dict:
+        """Return the results of the question built from a single query.
+
+        Finalized questions read their FinalResult rows, others the vote
+        counters of their choices.
+
+        Returns:
+            dict: `choices` as a list of dicts with `id`, `choice_text`, `votes`,
+            `percentage` and `leading`, the `total` number of votes and the
+            `leader` (the first choice with the most votes, None without votes).
+        """
+        if self.finalized_at is not None:
+            counts = (self.final_results.annotate(total=Window(Sum('votes'))).order_by('choice_id')
+                      .values_list('choice_id', 'choice__choice_text', 'votes', 'total'))
+        else:
+            counts = (self.choice_set.annotate(total=Window(Sum('votes'))).order_by('id')
+                      .values_list('id', 'choice_text', 'votes', 'total'))
+        counts = list(counts)
+        total = counts[0][3] if counts else 0
+        most_votes = max((votes for _, _, votes, _ in counts), default=0)
+        rows = []
+        leader = None
+        for choice_id, choice_text, votes, _ in counts:
+            row = {
+                'id': choice_id,
+                'choice_text': choice_text,
+                'votes': votes,
+                'percentage': votes * 100 / total if total else 0,
+                'leading': bool(total) and votes == most_votes,
+            }
+            if row['leading'] and leader is None:
+                leader = row
+            rows.append(row)
+        return {'choices': rows, 'total': total, 'leader': leader}
+
 
 class Choice(models.Model):
     """Choice assigned to each question."""
 
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
-    # votes = models.IntegerField(default=0)
+    # Denormalized counter of Vote rows, maintained by Vote.objects.cast().
+    # Run `manage.py recount_votes` to rebuild it from the Vote table.
+    votes = models.IntegerField(default=0)
 
     def __str__(self):
         """Return choice text as string representation."""
         return self.choice_text
 
-    @property
-    def votes(self) -> int:
-        """Return votes in that choice."""
-        return Vote.objects.filter(choice=self).count()
+
+class FinalResult(models.Model):
+    """Vote count of a choice frozen when its question closed."""
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='final_results')
+    choice = models.OneToOneField(Choice, on_delete=models.CASCADE, related_name='final_result')
+    votes = models.PositiveIntegerField()
+
+    def __str__(self):
+        """Return the final count of the choice."""
+        return f"{self.choice}: {self.votes}"
+
+
+class VoteArchive(models.Model):
+    """Ballots of a finalized question moved out of the Vote table.
+
+    `ballots` is zlib-compressed JSON Lines with one `{"voter": ..., "choice": ...}`
+    object per vote, see polls.archive.
+    """
+
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='vote_archive')
+    ballots = models.BinaryField()
+    count = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """Return the number of archived ballots of the question."""
+        return f"{self.count} ballot(s) of {self.question}"
+
+
+class VoteManager(models.Manager):
+    """Manager that keeps choice vote counters in step with votes."""
+
+    def cast(self, voter: User, choice: Choice):
+        """Record the vote of `voter` for `choice`.
+
+        The vote is inserted first and the unique (voter, question) constraint
+        decides whether the voter already voted, so concurrent votes of the
+        same user cannot create two rows. A previous vote is moved to the new
+        choice. Counters of both choices are updated in the same transaction.
+
+        Returns:
+            Vote: The created or updated vote
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    vote = self.create(choice=choice, voter=voter, question_id=choice.question_id)
+            except IntegrityError:
+                vote = self.select_for_update().get(voter=voter, question_id=choice.question_id)
+                if vote.choice_id == choice.pk:
+                    return vote
+                Choice.objects.filter(pk=vote.choice_id).update(votes=F('votes') - 1)
+                vote.choice = choice
+                vote.save(update_fields=['choice'])
+            Choice.objects.filter(pk=choice.pk).update(votes=F('votes') + 1)
+            Question.objects.filter(pk=choice.question_id).update(version=F('version') + 1, modified=timezone.now())
+        return vote
+
+    def cast_many(self, ballots: dict, batch_size: int = 500) -> set:
+        """Record many votes at once in a single transaction.
+
+        Args:
+            ballots (dict): Mapping of (voter id, question id) to choice id
+            batch_size (int): Number of rows per bulk query
+        Returns:
+            set: Ids of questions that received votes
+        """
+        if not ballots:
+            return set()
+        voter_ids = {voter_id for voter_id, _ in ballots}
+        question_ids = {question_id for _, question_id in ballots}
+        deltas = Counter()
+        with transaction.atomic():
+            existing = {}
+            for vote in self.filter(voter_id__in=voter_ids, question_id__in=question_ids):
+                existing[(vote.voter_id, vote.question_id)] = vote
+            new_votes = []
+            changed_votes = []
+            for key, choice_id in ballots.items():
+                vote = existing.get(key)
+                if vote is None:
+                    new_votes.append(self.model(voter_id=key[0], question_id=key[1], choice_id=choice_id))
+                    deltas[choice_id] += 1
+                elif vote.choice_id != choice_id:
+                    deltas[vote.choice_id] -= 1
+                    deltas[choice_id] += 1
+                    vote.choice_id = choice_id
+                    changed_votes.append(vote)
+            self.bulk_create(new_votes, batch_size=batch_size)
+            self.bulk_update(changed_votes, ['choice'], batch_size=batch_size)
+            for choice_id, delta in deltas.items():
+                if delta:
+                    Choice.objects.filter(pk=choice_id).update(votes=F('votes') + delta)
+            Question.objects.filter(pk__in=question_ids).update(version=F('version') + 1, modified=timezone.now())
+        return question_ids
+
+    def retract(self, votes) -> set:
+        """Delete `votes` and take them off the counters of their choices.
+
+        Returns:
+            set: Ids of questions that lost votes
+        """
+        with transaction.atomic():
+            rows = list(votes.select_for_update().values_list('id', 'choice_id', 'question_id'))
+            if not rows:
+                return set()
+            self.filter(pk__in=[vote_id for vote_id, _, _ in rows]).delete()
+            for choice_id, count in Counter(choice_id for _, choice_id, _ in rows).items():
+                Choice.objects.filter(pk=choice_id).update(votes=F('votes') - count)
+            question_ids = {question_id for _, _, question_id in rows}
+            Question.objects.filter(pk__in=question_ids).update(version=F('version') + 1, modified=timezone.now())
+        return question_ids
 
 
 class Vote(models.Model):
     """Vote assigned to each choice."""
 
     choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    # Denormalized from choice.question to enforce one vote per question.
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
     voter = models.ForeignKey(
                               User,
                               on_delete=models.CASCADE,
                               null=False,
                               blank=False)
 
+    objects = VoteManager()
+
+    class Meta:
+        """Allow only one vote per user on each question."""
+
+        constraints = [
+            models.UniqueConstraint(fields=['voter', 'question'], name='unique_vote_per_question'),
+        ]
+
     def __str__(self):
         """Return vote representation using both username and choice."""
         return f"Vote by {self.voter.username} for {self.choice}"
+
+    def save(self, *args, **kwargs):
+        """Fill the question from the choice before saving."""
+        if self.question_id is None:
+            self.question_id = self.choice.question_id
+        super().save(*args, **kwargs)
@@ -0,0 +1,54 @@
+"""Full-text search of question texts.
+
+On SQLite, migration 0014 keeps the FTS5 table `polls_question_fts` in step
+with `polls_question` through triggers. Other databases, and SQLite builds
+without FTS5, fall back to the admin's LIKE search.
+
+Migrations that rebuild `polls_question` on SQLite (most AlterField
+operations) drop its triggers, so they must recreate them. Until they do,
+the index goes stale and searches fall back to LIKE too.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'polls_question_fts'
+FTS_TRIGGERS = {f'{FTS_TABLE}_{event}' for event in ('insert', 'delete', 'update')}
+
+# Whether the FTS table and its triggers exist, per database alias.
+_available = {}
+
+
+def fts_available(using: str) -> bool:
+    """Return True if the database `using` has the FTS table and the triggers keeping it in step."""
+    if using not in _available:
+        connection = connections[using]
+        _available[using] = (connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+                             and FTS_TRIGGERS <= fts_triggers(connection))
+    return _available[using]
+
+
+def fts_triggers(connection) -> set:
+    """Return names of the triggers on `polls_question`."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'polls_question'")
+        return {name for name, in cursor.fetchall()}
+
+
+def match_expression(text: str) -> str:
+    """Return an FTS5 query matching every word of `text` as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_questions(queryset, text: str):
+    """Return questions of `queryset` whose text contains every word of `text`.
+
+    Returns None when full-text search is not available.
+    """
+    if not fts_available(queryset.db):
+        return None
+    expression = match_expression(text)
+    if not expression:
+        return queryset
+    return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (expression,)))
@@ -0,0 +1,257 @@
+"""Bulk loading of large poll datasets.
+
+Records are dicts with a `model` key ("question", "choice", "user" or
+"vote") and the fields of that model. They come from generate_records(),
+a JSONL file or a directory of CSV files (questions.csv, choices.csv,
+users.csv and votes.csv), and are written with bulk_create in chunks.
+"""
+import csv
+import datetime
+import itertools
+import json
+import math
+import os
+import random
+from contextlib import contextmanager, nullcontext
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Choice, Question, Vote
+
+MODELS = ('question', 'choice', 'user', 'vote')
+CSV_FILES = {'question': 'questions.csv', 'choice': 'choices.csv', 'user': 'users.csv', 'vote': 'votes.csv'}
+# Synthetic users get an unusable password without paying for hashing.
+SEED_PASSWORD = f"{UNUSABLE_PASSWORD_PREFIX}seed"
+
+
+def _next_id(model) -> int:
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def generate_records(questions: int, choices: int, users: int, votes: int,
+                     open_ratio: float = 0.1, rng: random.Random = None):
+    """Yield synthetic records with ids following the existing rows.
+
+    An `open_ratio` share of the questions, spread evenly, is still open.
+    Closed questions were published up to a year ago and ran for one to
+    sixty days. Each (user, question) pair votes at most once.
+    """
+    rng = rng or random.Random(0)
+    now = timezone.now()
+    question_start, choice_start, user_start = _next_id(Question), _next_id(Choice), _next_id(User)
+    for i in range(questions):
+        if int((i + 1) * open_ratio) > int(i * open_ratio):
+            pub_date = now - datetime.timedelta(minutes=rng.randrange(1, 30 * 24 * 60))
+            end_date = now + datetime.timedelta(days=rng.randint(1, 60))
+        else:
+            pub_date = now - datetime.timedelta(minutes=rng.randrange(61 * 24 * 60, 365 * 24 * 60))
+            end_date = pub_date + datetime.timedelta(days=rng.randint(1, 60))
+        yield {
+            'model': 'question', 'id': question_start + i, 'question_text': f"Question {question_start + i}",
+            'pub_date': pub_date, 'end_date': end_date,
+        }
+    for i in range(questions * choices):
+        yield {
+            'model': 'choice', 'id': choice_start + i, 'question': question_start + i // choices,
+            'choice_text': f"Choice {i % choices + 1}",
+        }
+    for i in range(users):
+        yield {'model': 'user', 'id': user_start + i, 'username': f"seed_{user_start + i}"}
+    pairs = users * questions
+    votes = min(votes, pairs)
+    # Walk the (user, question) pairs in a scattered order that never repeats.
+    step = next(step for step in itertools.count(max(pairs // 2 + 1, 1)) if math.gcd(step, pairs) == 1)
+    for k in range(votes):
+        pair = k * step % pairs
+        question_index = pair // users
+        yield {
+            'model': 'vote', 'voter': user_start + pair % users, 'question': question_start + question_index,
+            'choice': choice_start + question_index * choices + rng.randrange(choices),
+        }
+
+
+def read_jsonl(path: str):
+    """Yield records from a JSONL file."""
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv(directory: str):
+    """Yield records from the CSV files of a directory, in loading order."""
+    for model in MODELS:
+        path = os.path.join(directory, CSV_FILES[model])
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='') as file:
+            for row in csv.DictReader(file):
+                yield {'model': model, **row}
+
+
+def _datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+    return parsed
+
+
+def _id(value):
+    return int(value) if value not in (None, '') else None
+
+
+class Loader:
+    """Write records with bulk_create in chunks of `batch_size`."""
+
+    def __init__(self, batch_size: int = 5000):
+        """Start with empty buffers."""
+        self.batch_size = batch_size
+        self.counts = dict.fromkeys(MODELS, 0)
+        self.question_ids = set()
+        self._buffers = {model: [] for model in MODELS}
+        self._choice_questions = {}
+
+    def add(self, record: dict):
+        """Buffer a record and write its model's chunk when it is full."""
+        model = record['model']
+        if model not in MODELS:
+            raise ValueError(f"Unknown model: {model}")
+        buffer = self._buffers[model]
+        buffer.append(getattr(self, f'_build_{model}')(record))
+        if len(buffer) >= self.batch_size:
+            self._write(model)
+
+    def load(self, records) -> dict:
+        """Write every record and return the number of rows per model."""
+        for record in records:
+            self.add(record)
+        self.flush()
+        return self.counts
+
+    def flush(self):
+        """Write every buffered record, parents first."""
+        for model in MODELS:
+            self._write(model)
+
+    def _write(self, model: str):
+        buffer = self._buffers[model]
+        if not buffer:
+            return
+        if model == 'vote':
+            # Votes may reference choices that are still buffered.
+            self._write('choice')
+            self._resolve_questions(buffer)
+        elif model == 'choice':
+            self._write('question')
+        buffer[0].__class__.objects.bulk_create(buffer, batch_size=self.batch_size)
+        self.counts[model] += len(buffer)
+        buffer.clear()
+
+    def _resolve_questions(self, votes):
+        # Questions of choices loaded before are read with one query per chunk.
+        missing = {vote.choice_id for vote in votes if vote.question_id is None} - self._choice_questions.keys()
+        if missing:
+            choices = Choice.objects.only('question').in_bulk(missing)
+            self._choice_questions.update((choice_id, choice.question_id) for choice_id, choice in choices.items())
+        for vote in votes:
+            if vote.question_id is None:
+                if vote.choice_id not in self._choice_questions:
+                    raise Choice.DoesNotExist(f"Choice {vote.choice_id} does not exist.")
+                vote.question_id = self._choice_questions[vote.choice_id]
+            self.question_ids.add(vote.question_id)
+
+    def _build_question(self, record):
+        return Question(id=_id(record.get('id')), question_text=record['question_text'],
+                        pub_date=_datetime(record['pub_date']), end_date=_datetime(record['end_date']))
+
+    def _build_choice(self, record):
+        # Counts are kept for exports without ballots, questions with vote
+        # records are recounted after the load.
+        choice = Choice(id=_id(record.get('id')), question_id=_id(record['question']),
+                        choice_text=record['choice_text'], votes=_id(record.get('votes')) or 0)
+        if choice.id is not None:
+            self._choice_questions[choice.id] = choice.question_id
+        return choice
+
+    def _build_user(self, record):
+        return User(id=_id(record.get('id')), username=record['username'],
+                    password=record.get('password') or SEED_PASSWORD)
+
+    def _build_vote(self, record):
+        choice_id = _id(record['choice'])
+        question_id = _id(record.get('question'))
+        if question_id is None:
+            question_id = self._choice_questions.get(choice_id)
+        return Vote(voter_id=_id(record['voter']), question_id=question_id, choice_id=choice_id)
+
+
+def rebuild_counters(question_ids, batch_size: int = 500):
+    """Set vote counters of the questions' choices from the Vote table."""
+    question_ids = sorted(question_ids)
+    for start in range(0, len(question_ids), batch_size):
+        Choice.objects.filter(question_id__in=question_ids[start:start + batch_size]).update(
+            votes=Coalesce(Subquery(
+                Vote.objects.filter(choice=OuterRef('pk')).values('choice')
+                .annotate(count=Count('id')).values('count')
+            ), 0)
+        )
+
+
+@contextmanager
+def indexes_dropped(models=(Question, Choice, Vote)):
+    """Drop secondary indexes of the models and rebuild them on exit.
+
+    Primary keys and unique constraints are kept, so loaded data is still
+    checked for duplicate votes.
+    """
+    dropped = []
+    with connection.cursor() as cursor:
+        for model in models:
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+            for name, info in constraints.items():
+                if info['index'] and not info['unique'] and not info['primary_key']:
+                    dropped.append(model)
+                    with connection.schema_editor() as editor:
+                        # Schema editor helpers are private but generate backend specific SQL.
+                        editor.execute(editor._delete_index_sql(model, name))
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model in dict.fromkeys(dropped):
+                for sql in editor._model_indexes_sql(model):
+                    editor.execute(sql)
+
+
+def seed(records, batch_size: int = 5000, drop_indexes: bool = False) -> dict:
+    """Load records in one transaction, then rebuild vote counters of questions with votes.
+
+    With `drop_indexes`, secondary indexes are dropped before the load and
+    rebuilt after it, outside the loading transaction.
+
+    Returns:
+        dict: Number of loaded rows per model
+    """
+    loader = Loader(batch_size)
+    with indexes_dropped() if drop_indexes else nullcontext():
+        with transaction.atomic():
+            counts = loader.load(records)
+            # Rows were inserted with explicit ids, move sequences past them.
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Question, Choice, User, Vote]):
+                    cursor.execute(sql)
+    # Counting needs the vote indexes, so it runs after they are rebuilt.
+    with transaction.atomic():
+        rebuild_counters(loader.question_ids)
+    return counts
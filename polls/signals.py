@@ -0,0 +1,52 @@
+"""Signal receivers of poll application."""
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_results
+from .http_cache import catalog_changed, invalidate_results_page
+from .lifecycle import reopen
+from .models import Choice, Question, Vote
+from .views import results_changed
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_results(sender, instance, **kwargs):
+    """Drop cached results and pages when a question is edited or deleted."""
+    invalidate_results(instance.pk)
+    invalidate_results_page(instance.pk)
+    catalog_changed()
+
+
+@receiver(post_save, sender=Question)
+def reopen_extended_question(sender, instance, raw=False, **kwargs):
+    """Drop final counts when the voting of a finalized question is extended."""
+    if not raw and instance.finalized_at is not None and instance.end_date >= timezone.now():
+        reopen(instance)
+
+
+@receiver(pre_delete, sender=User)
+def retract_votes_of_deleted_user(sender, instance, **kwargs):
+    """Take the votes of a deleted user off the counters before they are cascaded."""
+    for question_id in Vote.objects.retract(Vote.objects.filter(voter=instance)):
+        transaction.on_commit(partial(results_changed, question_id))
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_choice_results(sender, instance, raw=False, **kwargs):
+    """Drop cached results when a choice is edited or deleted.
+
+    The question version is bumped too, which renews cached results tables
+    and ETags. Fixtures carry their own versions.
+    """
+    invalidate_results(instance.question_id)
+    invalidate_results_page(instance.question_id)
+    if not raw:
+        Question.objects.filter(pk=instance.question_id).update(version=F('version') + 1, modified=timezone.now())
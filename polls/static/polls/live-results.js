@@ -0,0 +1,24 @@
+// Update the results table from the Server-Sent Events stream of the question.
+(function () {
+    const table = document.querySelector('.result-table[data-stream]');
+    if (!table || !window.EventSource) {
+        return;
+    }
+    const leader = document.querySelector('.leader');
+    const source = new EventSource(table.dataset.stream);
+    source.addEventListener('results', function (event) {
+        const results = JSON.parse(event.data);
+        results.choices.forEach(function (choice) {
+            const row = table.querySelector('tr[data-choice="' + choice.id + '"]');
+            if (!row) {
+                return;
+            }
+            row.querySelector('.votes').textContent = choice.votes;
+            row.querySelector('.percentage').textContent = choice.percentage.toFixed(1) + '%';
+            row.classList.toggle('leading', choice.leading);
+        });
+        table.querySelector('.total').textContent = results.total;
+        leader.hidden = !results.leader;
+        leader.querySelector('.leader-text').textContent = results.leader ? results.leader.choice_text : '';
+    });
+})();
@@ -47,6 +47,7 @@ class VotingSystemTest(TestCase):
         """Voting will increase vote by one."""
         self.login()
         self.client.post(self.vote_url, data={"choice": self.test_choice_1.id})
+        self.test_choice_1.refresh_from_db()
         self.assertEqual(self.test_choice_1.votes, 1)
 
     def login(self):
@@ -59,6 +60,7 @@ class VotingSystemTest(TestCase):
         # Attempt to vote 3 times
         for _ in range(3):
             self.client.post(self.vote_url, data={"choice": self.test_choice_1.id})
+        self.test_choice_1.refresh_from_db()
         self.assertEqual(self.test_choice_1.votes, 1)
 
     def test_voting_with_different_choice(self):
@@ -69,6 +71,8 @@ class VotingSystemTest(TestCase):
         self.login()
         self.client.post(self.vote_url, data={"choice": self.test_choice_1.id})
         self.client.post(self.vote_url, data={"choice": self.test_choice_2.id})
+        self.test_choice_1.refresh_from_db()
+        self.test_choice_2.refresh_from_db()
         self.assertEqual(self.test_choice_1.votes, 0)
         self.assertEqual(self.test_choice_2.votes, 1)
 
@@ -86,5 +90,6 @@ class VotingSystemTest(TestCase):
         self.test_question.save()
         response = self.client.post(self.vote_url, data={"choice": self.test_choice_1.id}, follow=False)
         self.assertEqual(response.status_code, 302)
+        self.test_choice_1.refresh_from_db()
         self.assertEqual(self.test_choice_1.votes, 0)
         self.assertEqual(response.url, reverse('polls:index'))
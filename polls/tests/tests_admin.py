@@ -0,0 +1,105 @@
+"""Tests for the admin of poll application."""
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from polls import search
+from polls.models import Question, Vote
+
+
+class AdminTest(TestCase):
+    """Tests for the question and vote admins."""
+
+    def setUp(self):
+        """Log in a superuser."""
+        self.admin = User.objects.create_superuser(username="admin", password="adminPassword1")
+        self.client.login(username="admin", password="adminPassword1")
+
+    def create_question(self, text, votes=0):
+        """Create an open question with one choice and `votes` votes."""
+        now = timezone.now()
+        question = Question.objects.create(question_text=text, pub_date=now - datetime.timedelta(days=1),
+                                           end_date=now + datetime.timedelta(days=1))
+        question.choice_set.create(choice_text="Choice", votes=votes)
+        return question
+
+    def list_queries(self, **params):
+        """Return the changelist response and its number of queries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:polls_question_changelist'), params)
+        return response, len(queries)
+
+    def test_vote_totals_in_one_query(self):
+        """Vote totals are annotated, so the list costs the same for any number of questions."""
+        self.create_question("First", votes=2)
+        _, few = self.list_queries()
+        for index in range(5):
+            self.create_question(f"Question {index}", votes=index)
+        response, many = self.list_queries()
+        self.assertEqual(few, many)
+        self.assertContains(response, '<td class="field-total_votes">2</td>', html=True)
+
+    def test_full_text_search(self):
+        """Searches match word prefixes through the full-text index."""
+        if not search.fts_available('default'):
+            self.skipTest("The database has no full-text index.")
+        question = self.create_question("How would you celebrate the end of the semester?")
+        self.create_question("What is your favorite subject?")
+        response, _ = self.list_queries(q="celeb semest")
+        self.assertEqual(list(response.context['cl'].result_list), [question])
+        question.question_text = "Renamed question"
+        question.save()
+        response, _ = self.list_queries(q="celeb")
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_search_without_triggers(self):
+        """Searches fall back to LIKE when a migration dropped the triggers keeping the index in step."""
+        if not search.fts_available('default'):
+            self.skipTest("The database has no full-text index.")
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER polls_question_fts_insert")
+        question = self.create_question("How would you celebrate the end of the semester?")
+        with mock.patch.dict(search._available, clear=True):
+            self.assertFalse(search.fts_available('default'))
+            response, _ = self.list_queries(q="celebrate")
+        self.assertEqual(list(response.context['cl'].result_list), [question])
+
+    def test_search_expression(self):
+        """Words are quoted prefix terms, so user input cannot inject FTS syntax."""
+        self.assertEqual(search.match_expression('end" OR *'), '"end"* "OR"*')
+
+    def test_votes_are_read_only(self):
+        """Votes cannot be added or edited outside the voting views."""
+        question = self.create_question("Voted")
+        vote = Vote.objects.cast(self.admin, question.choice_set.get())
+        self.assertEqual(self.client.get(reverse('admin:polls_vote_add')).status_code, 403)
+        url = reverse('admin:polls_vote_change', args=(vote.id,))
+        response = self.client.post(url, {'voter': self.admin.id, 'question': question.id, 'choice': 999})
+        self.assertEqual(response.status_code, 403)
+
+    def test_vote_deletion_keeps_counters(self):
+        """Deleting votes takes them off their choice counters and renews the question version."""
+        question = self.create_question("Voted")
+        choice = question.choice_set.get()
+        vote = Vote.objects.cast(self.admin, choice)
+        version = Question.objects.get(pk=question.pk).version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:polls_vote_changelist'),
+                             {'action': 'delete_selected', '_selected_action': [vote.id], 'post': 'yes'})
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 0)
+        self.assertFalse(Vote.objects.exists())
+        self.assertGreater(Question.objects.get(pk=question.pk).version, version)
+
+    def test_vote_list(self):
+        """The vote list selects related rows in the same query."""
+        question = self.create_question("Voted")
+        Vote.objects.cast(self.admin, question.choice_set.get())
+        response = self.client.get(reverse('admin:polls_vote_changelist'))
+        self.assertContains(response, "Voted")
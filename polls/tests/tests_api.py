@@ -0,0 +1,83 @@
+"""Tests for the JSON read API."""
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.cache import get_cache
+from polls.models import Question, Vote
+
+
+class JsonApiTest(TestCase):
+    """Tests for question list, detail and results endpoints."""
+
+    def setUp(self):
+        """Create an open question with a choice."""
+        get_cache().clear()
+        self.question = Question.objects.create(
+            question_text="API question",
+            pub_date=timezone.now() - datetime.timedelta(days=1),
+            end_date=timezone.now() + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="API choice")
+        self.results_url = reverse('polls:api-results', args=(self.question.id,))
+
+    def test_question_list(self):
+        """The list returns published questions with their state."""
+        response = self.client.get(reverse('polls:api-questions'))
+        questions = response.json()['questions']
+        self.assertEqual([question['id'] for question in questions], [self.question.id])
+        self.assertTrue(questions[0]['is_open'])
+
+    def test_question_list_not_modified(self):
+        """The list answers 304 while its page is unchanged."""
+        url = reverse('polls:api-questions')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Question.objects.create(question_text="New question", pub_date=timezone.now(), end_date=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_edits_are_modified(self):
+        """Editing a question changes the ETags of the list and of its detail, even within a second."""
+        list_url = reverse('polls:api-questions')
+        detail_url = reverse('polls:api-question', args=(self.question.id,))
+        list_etag = self.client.get(list_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+        self.question.question_text = "Edited question"
+        self.question.save()
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['questions'][0]['question_text'], "Edited question")
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+    def test_question_detail(self):
+        """The detail returns the question and its choices."""
+        response = self.client.get(reverse('polls:api-question', args=(self.question.id,)))
+        self.assertEqual(response.json()['choices'], [{'id': self.choice.id, 'choice_text': "API choice"}])
+
+    def test_results(self):
+        """Results include vote counts."""
+        data = self.client.get(self.results_url).json()
+        self.assertEqual(data['question']['id'], self.question.id)
+        self.assertEqual(data['choices'][0]['votes'], 0)
+        self.assertEqual(data['total'], 0)
+
+    def test_results_not_modified(self):
+        """Results answer 304 with a single query until the next vote."""
+        response = self.client.get(self.results_url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.results_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Vote.objects.cast(User.objects.create_user(username="api"), self.choice)
+        self.assertEqual(self.client.get(self.results_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unpublished_question(self):
+        """Unpublished questions are not found."""
+        self.question.pub_date = timezone.now() + datetime.timedelta(days=1)
+        self.question.save()
+        response = self.client.get(self.results_url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': "Question not found"})
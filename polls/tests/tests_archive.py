@@ -0,0 +1,76 @@
+"""Tests for archival of votes."""
+import datetime
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from polls import archive, lifecycle
+from polls.models import Question, Vote, VoteArchive
+
+
+class ArchiveTest(TestCase):
+    """Tests for moving votes of finalized questions into archives."""
+
+    def setUp(self):
+        """Create a finalized question with votes and an open question with a vote."""
+        now = timezone.now()
+        self.closed = Question.objects.create(question_text="Closed", pub_date=now - datetime.timedelta(days=2),
+                                              end_date=now - datetime.timedelta(days=1))
+        self.choice = self.closed.choice_set.create(choice_text="Closed choice")
+        self.open = Question.objects.create(question_text="Open", pub_date=now - datetime.timedelta(days=1),
+                                            end_date=now + datetime.timedelta(days=1))
+        open_choice = self.open.choice_set.create(choice_text="Open choice")
+        self.voters = [User.objects.create_user(username=f"voter{index}") for index in range(3)]
+        for voter in self.voters:
+            Vote.objects.cast(voter, self.choice)
+        Vote.objects.cast(self.voters[0], open_choice)
+        lifecycle.finalize(self.closed.id)
+
+    def test_archive_moves_votes(self):
+        """Votes of finalized questions leave the Vote table but stay auditable."""
+        self.assertEqual(archive.archive_due(), {self.closed.id: 3})
+        self.assertEqual(list(Vote.objects.values_list('question', flat=True)), [self.open.id])
+        self.assertEqual(VoteArchive.objects.get().count, 3)
+        ballots = list(archive.read_ballots(self.closed.id))
+        self.assertEqual(ballots, [{'voter': voter.id, 'choice': self.choice.id} for voter in self.voters])
+        self.closed.refresh_from_db()
+        self.assertEqual(self.closed.get_results()['total'], 3)
+
+    def test_open_questions_are_not_archived(self):
+        """Questions that are not finalized keep their votes."""
+        self.assertEqual(archive.archive(self.open.id), 0)
+        self.assertEqual(list(archive.read_ballots(self.open.id)), [{'voter': self.voters[0].id,
+                                                                     'choice': self.open.choice_set.get().id}])
+
+    def test_reopening_restores_votes(self):
+        """Extending an archived question moves its votes back."""
+        archive.archive(self.closed.id)
+        self.closed.refresh_from_db()
+        self.closed.end_date = timezone.now() + datetime.timedelta(days=1)
+        self.closed.save()
+        self.assertEqual(Vote.objects.filter(question=self.closed).count(), 3)
+        self.assertFalse(VoteArchive.objects.exists())
+
+    def test_recount_skips_archived_questions(self):
+        """Counters of archived questions are not reset by recount_votes."""
+        archive.archive(self.closed.id)
+        out = io.StringIO()
+        call_command('recount_votes', stdout=out)
+        self.assertIn("All vote counters are consistent.", out.getvalue())
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, 3)
+
+    def test_command(self):
+        """The command archives due questions and prints ballots on demand."""
+        out = io.StringIO()
+        call_command('archive_votes', stdout=out)
+        self.assertIn("Archived 3 vote(s) of 1 question(s).", out.getvalue())
+        out = io.StringIO()
+        call_command('archive_votes', audit=self.closed.id, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(json.loads(lines[0]), {'voter': self.voters[0].id, 'choice': self.choice.id})
+        self.assertEqual(len(lines), 3)
@@ -0,0 +1,94 @@
+"""Tests for async views of poll application."""
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from mysite.middleware import metrics
+from polls.cache import get_cache
+from polls.http_cache import get_results_page
+from polls.models import Question
+from polls.urls import async_urlpatterns
+
+urlpatterns = [
+    path('polls/', include((async_urlpatterns, 'polls'))),
+    path('accounts/', include('django.contrib.auth.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTest(TestCase):
+    """Tests for the async index, detail, results and vote views."""
+
+    def setUp(self):
+        """Create an open, a closed and a future question."""
+        get_cache().clear()
+        now = timezone.now()
+        self.question = Question.objects.create(
+            question_text="Async question",
+            pub_date=now - datetime.timedelta(days=1),
+            end_date=now + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="Async choice")
+        self.closed = Question.objects.create(
+            question_text="Closed question",
+            pub_date=now - datetime.timedelta(days=2),
+            end_date=now - datetime.timedelta(days=1))
+        self.future = Question.objects.create(
+            question_text="Future question",
+            pub_date=now + datetime.timedelta(days=1),
+            end_date=now + datetime.timedelta(days=2))
+        User.objects.create_user(username="async", password="asyncPassword1")
+
+    async def test_index(self):
+        """The index lists published questions."""
+        response = await self.async_client.get(reverse('polls:index'))
+        self.assertContains(response, "Async question")
+        self.assertNotContains(response, "Future question")
+
+    async def test_detail(self):
+        """The detail page shows choices of an open question."""
+        response = await self.async_client.get(reverse('polls:detail', args=(self.question.id,)))
+        self.assertContains(response, "Async choice")
+
+    async def test_detail_not_found(self):
+        """A future question redirects to the index."""
+        response = await self.async_client.get(reverse('polls:detail', args=(self.future.id,)))
+        self.assertRedirects(response, reverse('polls:index'), fetch_redirect_response=False)
+
+    async def test_results(self):
+        """The results page shows the results table."""
+        response = await self.async_client.get(reverse('polls:results', args=(self.question.id,)))
+        self.assertContains(response, "Async choice")
+
+    @override_settings(POLLS_LIVE_RESULTS=True)
+    async def test_results_are_not_streamed(self):
+        """Open results pages do not subscribe to a stream, which would block the event loop."""
+        response = await self.async_client.get(reverse('polls:results', args=(self.question.id,)))
+        self.assertNotContains(response, "data-stream")
+        self.assertNotIn('results-stream', [pattern.name for pattern in async_urlpatterns])
+
+    async def test_closed_results_are_cached(self):
+        """The results page of a closed question is cached and shared."""
+        url = reverse('polls:results', args=(self.closed.id,))
+        first = await self.async_client.get(url)
+        second = await self.async_client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertIn('public', second['Cache-Control'])
+        self.assertIsNotNone(await sync_to_async(get_results_page)(self.closed.id))
+
+    async def test_queries_are_measured(self):
+        """Queries run in sync_to_async threads are counted by the metrics middleware."""
+        metrics.clear()
+        await self.async_client.get(reverse('polls:results', args=(self.question.id,)))
+        self.assertEqual(metrics.summary()['polls:results']['queries']['p50'], 2)
+
+    def test_vote(self):
+        """Voting through the async view records the vote."""
+        self.client.login(username="async", password="asyncPassword1")
+        response = self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.id})
+        self.assertRedirects(response, reverse('polls:results', args=(self.question.id,)))
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, 1)
@@ -1,4 +1,6 @@
 """Test for authentication."""
+from unittest import mock
+
 import django.test
 from django.contrib.auth.models import User
 from django.urls import reverse
@@ -32,3 +34,20 @@ class UserAuthTest(django.test.TestCase):
         self.assertEqual(302, response.status_code)
         # should redirect us to the polls index page ("polls:index")
         self.assertRedirects(response, reverse("polls:index"))
+
+    def test_signup_logs_in(self):
+        """Test that signing up creates the user, logs them in and redirects to the index."""
+        form_data = {"username": "newuser", "password1": "Fat-Chance!2", "password2": "Fat-Chance!2"}
+        with mock.patch("django.contrib.auth.hashers.PBKDF2PasswordHasher.verify") as verify:
+            response = self.client.post(reverse("signup"), form_data)
+        self.assertRedirects(response, reverse("polls:index"), fetch_redirect_response=False)
+        # The password is hashed once and never checked again.
+        verify.assert_not_called()
+        self.assertEqual(int(self.client.session["_auth_user_id"]), User.objects.get(username="newuser").pk)
+
+    @django.test.override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookie_sessions(self):
+        """Test that a user stays logged in with sessions kept in signed cookies."""
+        self.client.login(username=self.username, password=self.password)
+        response = self.client.get(reverse("polls:index"))
+        self.assertContains(response, f"Hello, {self.username}")
@@ -0,0 +1,43 @@
+"""Tests for the benchmark harness."""
+from django.test import TestCase
+
+from polls import benchmark
+from polls.models import Choice, Question, Vote
+
+
+class BenchmarkTest(TestCase):
+    """Tests for seeding and running the benchmark in the current thread."""
+
+    def test_seed(self):
+        """Seeding creates the requested rows with consistent counters."""
+        data = benchmark.seed(questions=4, choices=3, users=5, votes=10)
+        self.assertEqual(Question.objects.count(), 4)
+        self.assertEqual(Choice.objects.count(), 12)
+        self.assertEqual(Vote.objects.count(), 10)
+        self.assertEqual(len(data['open_questions']), 2)
+        self.assertEqual(sum(Choice.objects.values_list('votes', flat=True)), 10)
+
+    def test_run(self):
+        """Running reports every endpoint without errors."""
+        data = benchmark.seed(questions=4, choices=2, users=3, votes=4)
+        report = benchmark.run(data, requests=3, concurrency=1)
+        self.assertEqual(set(report), set(benchmark.ENDPOINTS))
+        for result in report.values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['queries_per_request'], 0)
+
+    def test_run_auth(self):
+        """Seeded users log in and new users sign up without errors."""
+        data = benchmark.seed(questions=2, choices=2, users=3, votes=2)
+        report = benchmark.run(data, endpoints=benchmark.AUTH_ENDPOINTS, requests=2, concurrency=1)
+        self.assertEqual(report['login']['errors'], 0)
+        self.assertEqual(report['signup']['errors'], 0)
+
+    def test_render(self):
+        """Rendering reports every configuration and template."""
+        data = benchmark.seed(questions=4, choices=2, users=3, votes=4)
+        report = benchmark.render(data, iterations=3)
+        self.assertEqual(set(report), set(benchmark.RENDER_CONFIGS))
+        for result in report.values():
+            self.assertEqual(set(result), {'question_list', 'results'})
@@ -0,0 +1,72 @@
+"""Tests for the SQLite database backend."""
+import os
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, override_settings
+
+from mysite.backends.sqlite3.base import DatabaseWrapper
+from mysite.middleware import check_connections
+
+
+@override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                                   'busy_timeout': 0, 'mmap_size': 1024 * 1024},
+                   SQLITE_TRANSACTION_MODE='IMMEDIATE')
+class SQLiteBackendTest(SimpleTestCase):
+    """Tests for pragmas, transactions and health checks of mysite.backends.sqlite3."""
+
+    def setUp(self):
+        """Point a connection factory at a throwaway database file."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_dict = {**connections['default'].settings_dict,
+                              'NAME': os.path.join(directory.name, 'test.db')}
+
+    def connect(self):
+        """Return a new connection to the throwaway database."""
+        wrapper = DatabaseWrapper(self.settings_dict)
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def test_default_backend(self):
+        """The project uses this backend by default."""
+        self.assertIsInstance(connections['default'], DatabaseWrapper)
+
+    def test_pragmas_applied_on_connect(self):
+        """New connections use WAL, normal syncs, the busy timeout and mmap size."""
+        cursor = self.connect().connection.cursor()
+        pragmas = {name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                   for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')}
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 0, 'mmap_size': 1024 * 1024,
+        })
+
+    def test_immediate_transactions(self):
+        """A transaction takes the write lock when it starts."""
+        first, second = self.connect(), self.connect()
+        first._start_transaction_under_autocommit()
+        self.addCleanup(first.connection.rollback)
+        with self.assertRaisesMessage(OperationalError, "database is locked"):
+            second._start_transaction_under_autocommit()
+
+    def test_unusable_connection_closed(self):
+        """A reused connection the server dropped is closed when a request starts."""
+        wrapper = self.connect()
+        with mock.patch.object(connections, 'all', return_value=[wrapper]):
+            check_connections()
+            self.assertIsNotNone(wrapper.connection)
+            with mock.patch.object(wrapper, 'is_usable', return_value=False):
+                check_connections()
+        self.assertIsNone(wrapper.connection)
+
+    def test_health_checks_disabled(self):
+        """Without CONN_HEALTH_CHECKS, connections are not checked."""
+        self.settings_dict['CONN_HEALTH_CHECKS'] = False
+        wrapper = self.connect()
+        with mock.patch.object(connections, 'all', return_value=[wrapper]), \
+                mock.patch.object(wrapper, 'is_usable', return_value=False) as is_usable:
+            check_connections()
+        is_usable.assert_not_called()
+        self.assertIsNotNone(wrapper.connection)
@@ -0,0 +1,114 @@
+"""Tests for streaming exports and imports of polls data."""
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from polls import archive, lifecycle
+from polls.models import Choice, Question, Vote
+from polls.seeding import CSV_FILES, SEED_PASSWORD
+
+
+class ExportTest(TestCase):
+    """Tests for export_polls, import_polls and the export endpoint."""
+
+    def setUp(self):
+        """Create an open question with a vote and a closed question with archived votes."""
+        now = timezone.now()
+        self.voter = User.objects.create_user(username="voter", password="voterPassword1")
+        self.open = Question.objects.create(question_text="Open question", pub_date=now - datetime.timedelta(days=1),
+                                            end_date=now + datetime.timedelta(days=1))
+        self.yes = self.open.choice_set.create(choice_text="Yes", votes=1)
+        self.open.choice_set.create(choice_text="No")
+        Vote.objects.create(voter=self.voter, question=self.open, choice=self.yes)
+        self.closed = Question.objects.create(question_text="Closed question",
+                                              pub_date=now - datetime.timedelta(days=2),
+                                              end_date=now - datetime.timedelta(days=1))
+        self.final = self.closed.choice_set.create(choice_text="Final", votes=1)
+        Vote.objects.create(voter=self.voter, question=self.closed, choice=self.final)
+        lifecycle.finalize(self.closed.id)
+        archive.archive(self.closed.id)
+
+    def snapshot(self):
+        """Return the polls data as comparable lists."""
+        return (
+            list(Question.objects.order_by('id').values_list('id', 'question_text', 'pub_date', 'end_date')),
+            list(Choice.objects.order_by('id').values_list('id', 'question_id', 'choice_text', 'votes')),
+            sorted(Vote.objects.values_list('voter_id', 'question_id', 'choice_id')),
+        )
+
+    def clear(self):
+        """Delete every question and user."""
+        Question.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_jsonl_round_trip(self):
+        """A JSONL export with ballots imports back into an empty database, archived votes included."""
+        before = self.snapshot()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'polls.jsonl')
+            call_command('export_polls', path, ballots=True, stdout=StringIO())
+            self.clear()
+            call_command('import_polls', path, stdout=StringIO())
+        questions, choices, votes = self.snapshot()
+        self.assertEqual((questions, choices), before[:2])
+        self.assertEqual(votes, sorted(before[2] + [(self.voter.id, self.closed.id, self.final.id)]))
+        self.assertEqual(User.objects.get().username, "voter")
+        self.assertTrue(self.client.login(username="voter", password="voterPassword1"))
+
+    def test_import_into_loaded_database(self):
+        """Importing rows that already exist fails with a message and loads nothing."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'polls.jsonl')
+            call_command('export_polls', path, stdout=StringIO())
+            with self.assertRaisesMessage(CommandError, "Nothing was loaded"):
+                call_command('import_polls', path, stdout=StringIO())
+        self.assertEqual(Question.objects.count(), 2)
+
+    def test_csv_counts_without_ballots(self):
+        """A CSV export without ballots keeps vote counts of choices."""
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export_polls', directory, format='csv', stdout=StringIO())
+            self.assertEqual(sorted(os.listdir(directory)), [CSV_FILES['choice'], CSV_FILES['question']])
+            self.clear()
+            call_command('import_polls', directory, stdout=StringIO())
+        self.assertEqual(Choice.objects.get(pk=self.yes.pk).votes, 1)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_stdout(self):
+        """JSONL records can be written to stdout."""
+        out = StringIO()
+        call_command('export_polls', '-', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([record['model'] for record in records], ['question'] * 2 + ['choice'] * 3)
+
+    def test_endpoint_is_staff_only(self):
+        """The export endpoint redirects other users to the admin login."""
+        self.client.force_login(self.voter)
+        response = self.client.get(reverse('polls:api-export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_endpoint_streams(self):
+        """Staff get a streamed JSONL or CSV export."""
+        User.objects.create_user(username="staff", password="staffPassword1", is_staff=True)
+        self.client.login(username="staff", password="staffPassword1")
+        response = self.client.get(reverse('polls:api-export'), {'ballots': '1'})
+        self.assertTrue(response.streaming)
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([record['model'] for record in records].count('vote'), 2)
+        # Password hashes are only exported by the command.
+        passwords = {record['username']: record['password'] for record in records if record['model'] == 'user'}
+        self.assertEqual(passwords, {'voter': SEED_PASSWORD, 'staff': SEED_PASSWORD})
+        response = self.client.get(reverse('polls:api-export'), {'format': 'csv', 'model': 'question'})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,question_text,pub_date,end_date")
+        self.assertEqual(len(lines), 3)
+        response = self.client.get(reverse('polls:api-export'), {'format': 'csv', 'model': 'vote'})
+        self.assertEqual(response.status_code, 400)
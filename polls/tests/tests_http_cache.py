@@ -0,0 +1,176 @@
+"""Tests for lifecycle-aware page caching."""
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache.utils import make_template_fragment_key
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls import http_cache
+from polls.cache import get_cache
+from polls.models import Question
+
+
+def create_question(question_text, pub_days, end_days):
+    """Create a question published and ending `pub_days` and `end_days` days from now."""
+    now = timezone.now()
+    return Question.objects.create(question_text=question_text,
+                                   pub_date=now + datetime.timedelta(days=pub_days),
+                                   end_date=now + datetime.timedelta(days=end_days))
+
+
+class NextTransitionTest(TestCase):
+    """Tests for next_transition() and page_timeout()."""
+
+    def setUp(self):
+        """Clear the cache."""
+        get_cache().clear()
+
+    def test_no_transition(self):
+        """Without upcoming dates the page timeout is the configured maximum."""
+        create_question("Closed", -2, -1)
+        self.assertIsNone(http_cache.next_transition())
+        with self.settings(POLLS_PAGE_CACHE_TIMEOUT=123):
+            self.assertEqual(http_cache.page_timeout(None), 123)
+
+    def test_earliest_publication_or_end(self):
+        """The next transition is the earliest upcoming pub_date or end_date."""
+        open_question = create_question("Open", -1, 3)
+        future = create_question("Future", 2, 5)
+        self.assertEqual(http_cache.next_transition(), future.pub_date)
+        future.delete()
+        self.assertEqual(http_cache.next_transition(), open_question.end_date)
+
+    def test_transition_is_cached(self):
+        """The next transition is only queried once until a question changes."""
+        create_question("Open", -1, 3)
+        http_cache.next_transition()
+        with self.assertNumQueries(0):
+            http_cache.next_transition()
+
+    @override_settings(POLLS_PAGE_CACHE_TIMEOUT=3600)
+    def test_page_timeout_until_transition(self):
+        """Pages expire at the next transition when it is sooner than the maximum."""
+        now = timezone.now()
+        self.assertEqual(http_cache.page_timeout(now + datetime.timedelta(minutes=10), now), 600)
+        self.assertEqual(http_cache.page_timeout(now + datetime.timedelta(days=1), now), 3600)
+
+
+class IndexPageCacheTest(TestCase):
+    """Tests for caching of the index."""
+
+    def setUp(self):
+        """Create an open question and clear the cache."""
+        get_cache().clear()
+        self.question = create_question("Open question", -1, 1)
+        self.url = reverse('polls:index')
+
+    def test_question_list_is_cached(self):
+        """A second request renders the cached question list without listing questions."""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Open question")
+        self.assertNotIn('latest_question_list', response.context)
+
+    def test_new_question_invalidates_list(self):
+        """Creating a question renders the list again."""
+        self.client.get(self.url)
+        create_question("Another question", -1, 1)
+        self.assertContains(self.client.get(self.url), "Another question")
+
+    def test_edit_invalidates_list(self):
+        """Editing a question renders the list again."""
+        self.client.get(self.url)
+        self.question.question_text = "Edited question"
+        self.question.save()
+        self.assertContains(self.client.get(self.url), "Edited question")
+
+    def test_list_items_are_cached(self):
+        """List items are cached by question, modification time and state across pages."""
+        self.client.get(self.url)
+        key = make_template_fragment_key(http_cache.ITEM_FRAGMENT, [self.question.id, self.question.modified, True])
+        self.assertIn("Open question", http_cache.fragment_cache().get(key))
+
+    def test_edited_item_is_rendered_again(self):
+        """An edit changes the key of the list item, without relying on the signals of the editing process."""
+        self.client.get(self.url)
+        # Edit without the signals, like another process whose local caches this one cannot reach.
+        Question.objects.filter(pk=self.question.pk).update(question_text="Edited question", modified=timezone.now())
+        http_cache.catalog_changed()
+        self.assertContains(self.client.get(self.url), "Edited question")
+
+    @override_settings(POLLS_PAGE_CACHE_TIMEOUT=3600)
+    def test_anonymous_page_is_public_until_transition(self):
+        """Anonymous visitors get a shared page that expires when the open question closes."""
+        response = self.client.get(self.url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+        self.question.end_date = timezone.now() + datetime.timedelta(minutes=5)
+        self.question.save()
+        max_age = int(self.client.get(self.url)['Cache-Control'].split('max-age=')[1].split(',')[0])
+        self.assertTrue(0 < max_age <= 300)
+
+    def test_authenticated_page_is_private(self):
+        """The greeting stays out of shared caches."""
+        User.objects.create_user(username="user", password="userPassword1")
+        self.client.login(username="user", password="userPassword1")
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertContains(response, "Hello, user")
+        self.assertContains(response, "Open question")
+        self.assertIn('private', response['Cache-Control'])
+
+
+class ClosedResultsPageCacheTest(TestCase):
+    """Tests for caching of results pages of closed questions."""
+
+    def setUp(self):
+        """Create a closed question and clear the cache."""
+        get_cache().clear()
+        self.question = create_question("Closed question", -2, -1)
+        self.choice = self.question.choice_set.create(choice_text="Choice 1")
+        self.results_url = reverse('polls:results', args=(self.question.id,))
+
+    def test_results_page_is_cached(self):
+        """The results page of a closed question is served without queries."""
+        first = self.client.get(self.results_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.results_url)
+        self.assertEqual(first.content, second.content)
+        self.assertIn('public', second['Cache-Control'])
+
+    def test_detail_redirect_is_cached(self):
+        """The detail page of a closed question redirects to results with shared cache headers."""
+        self.client.get(self.results_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('polls:detail', args=(self.question.id,)))
+        self.assertRedirects(response, self.results_url)
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_open_results_page_is_not_cached(self):
+        """Results of open questions are not cached as pages."""
+        question = create_question("Open question", -1, 1)
+        self.client.get(reverse('polls:results', args=(question.id,)))
+        self.assertIsNone(http_cache.get_results_page(question.id))
+
+    def test_choice_change_renews_page(self):
+        """Editing a choice bumps the question version and drops the cached page."""
+        self.client.get(self.results_url)
+        self.choice.choice_text = "Renamed choice"
+        self.choice.save()
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.version, 2)
+        self.assertContains(self.client.get(self.results_url), "Renamed choice")
+
+    def test_reopening_invalidates_page(self):
+        """Extending the end date drops the cached page."""
+        self.client.get(self.results_url)
+        self.question.end_date = timezone.now() + datetime.timedelta(days=1)
+        self.question.save()
+        self.assertIsNone(http_cache.get_results_page(self.question.id))
+        response = self.client.get(reverse('polls:detail', args=(self.question.id,)))
+        self.assertEqual(response.status_code, 200)
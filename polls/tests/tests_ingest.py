@@ -0,0 +1,82 @@
+"""Tests for buffered vote ingestion."""
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from polls.ingest import VoteBuffer
+from polls.models import Question, Vote
+
+
+class VoteBufferTest(TestCase):
+    """Tests for VoteBuffer without the background flusher."""
+
+    def setUp(self):
+        """Create a question with two choices, two users and a buffer."""
+        self.question = Question.objects.create(
+            question_text="Buffered question",
+            pub_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=1))
+        self.choice_1 = self.question.choice_set.create(choice_text="Choice 1")
+        self.choice_2 = self.question.choice_set.create(choice_text="Choice 2")
+        self.user_1 = User.objects.create_user(username="voter1", password="voterPassword1")
+        self.user_2 = User.objects.create_user(username="voter2", password="voterPassword2")
+        self.buffer = VoteBuffer(batch_size=10, limit=2)
+
+    def assertVotes(self, choice, expected):
+        """Assert the stored counter of `choice` after reloading it."""
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, expected)
+
+    def test_flush_writes_votes(self):
+        """Flushing writes every pending ballot and empties the buffer."""
+        self.buffer.submit(self.user_1.id, self.question.id, self.choice_1.id)
+        self.buffer.submit(self.user_2.id, self.question.id, self.choice_2.id)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertVotes(self.choice_1, 1)
+        self.assertVotes(self.choice_2, 1)
+
+    def test_last_write_wins(self):
+        """Only the last ballot of a voter on a question is kept."""
+        self.buffer.submit(self.user_1.id, self.question.id, self.choice_1.id)
+        self.buffer.submit(self.user_1.id, self.question.id, self.choice_2.id)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertVotes(self.choice_1, 0)
+        self.assertVotes(self.choice_2, 1)
+
+    def test_flush_switches_existing_vote(self):
+        """A buffered ballot replaces a vote already in the database."""
+        Vote.objects.cast(self.user_1, self.choice_1)
+        self.buffer.submit(self.user_1.id, self.question.id, self.choice_2.id)
+        self.buffer.flush()
+        self.assertEqual(Vote.objects.get(voter=self.user_1).choice, self.choice_2)
+        self.assertVotes(self.choice_1, 0)
+        self.assertVotes(self.choice_2, 1)
+
+    def test_deleted_choice_is_dropped(self):
+        """Ballots for a choice deleted while buffered are dropped without blocking the others."""
+        self.buffer.submit(self.user_1.id, self.question.id, self.choice_1.id)
+        self.buffer.submit(self.user_2.id, self.question.id, self.choice_2.id)
+        self.choice_2.delete()
+        with self.assertLogs("polls", "WARNING"):
+            self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(Vote.objects.get().voter, self.user_1)
+        self.assertVotes(self.choice_1, 1)
+
+    def test_full_buffer_rejects(self):
+        """A full buffer rejects new voters so the caller writes synchronously."""
+        self.buffer.limit = 1
+        self.assertTrue(self.buffer.submit(self.user_1.id, self.question.id, self.choice_1.id))
+        self.assertFalse(self.buffer.submit(self.user_2.id, self.question.id, self.choice_1.id))
+        # Replacing a pending ballot does not need room.
+        self.assertTrue(self.buffer.submit(self.user_1.id, self.question.id, self.choice_2.id))
+
+    def test_stop_flushes(self):
+        """Stopping writes pending ballots and rejects new ones."""
+        self.buffer.submit(self.user_1.id, self.question.id, self.choice_1.id)
+        self.buffer.stop()
+        self.assertVotes(self.choice_1, 1)
+        self.assertFalse(self.buffer.submit(self.user_2.id, self.question.id, self.choice_1.id))
@@ -0,0 +1,99 @@
+"""Tests for finalization of closed questions."""
+import datetime
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls import archive, http_cache, lifecycle
+from polls.cache import get_cache
+from polls.models import FinalResult, Question, Vote
+
+
+class FinalizeTest(TestCase):
+    """Tests for freezing final counts."""
+
+    def setUp(self):
+        """Create a closed question with votes and an open question."""
+        get_cache().clear()
+        now = timezone.now()
+        self.closed = Question.objects.create(question_text="Closed", pub_date=now - datetime.timedelta(days=2),
+                                              end_date=now - datetime.timedelta(days=1))
+        self.first = self.closed.choice_set.create(choice_text="First")
+        self.second = self.closed.choice_set.create(choice_text="Second")
+        for index in range(3):
+            voter = User.objects.create_user(username=f"voter{index}")
+            Vote.objects.create(voter=voter, choice=self.first if index else self.second)
+        self.open = Question.objects.create(question_text="Open", pub_date=now - datetime.timedelta(days=1),
+                                            end_date=now + datetime.timedelta(days=1))
+
+    def test_finalize_freezes_counts(self):
+        """Final counts come from Vote rows and results are read from them."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(lifecycle.finalize_due(), [self.closed.id])
+        self.closed.refresh_from_db()
+        self.assertIsNotNone(self.closed.finalized_at)
+        self.assertEqual(dict(FinalResult.objects.values_list('choice', 'votes')),
+                         {self.first.id: 2, self.second.id: 1})
+        Vote.objects.all().delete()
+        results = self.closed.get_results()
+        self.assertEqual(results['total'], 3)
+        self.assertEqual(results['leader']['id'], self.first.id)
+
+    @override_settings(POLLS_WARM_CLOSED_RESULTS=True)
+    def test_finalize_warms_caches(self):
+        """The results page of a finalized question is served from the cache."""
+        with self.captureOnCommitCallbacks(execute=True):
+            lifecycle.finalize(self.closed.id)
+        self.assertIsNotNone(http_cache.get_results_page(self.closed.id))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('polls:results', args=(self.closed.id,)))
+        self.assertContains(response, "First")
+
+    @override_settings(POLLS_WARM_CLOSED_RESULTS=False)
+    def test_local_caches_are_not_warmed(self):
+        """Without a shared cache, finalization only drops stale copies."""
+        http_cache.set_results_page(self.closed.id, b"stale")
+        with self.captureOnCommitCallbacks(execute=True):
+            lifecycle.finalize(self.closed.id)
+        self.assertIsNone(http_cache.get_results_page(self.closed.id))
+
+    def test_finalize_after_stale_save(self):
+        """A save of a stale copy that cleared `finalized_at` does not break the next finalization."""
+        stale = Question.objects.get(pk=self.closed.id)
+        lifecycle.finalize(self.closed.id)
+        archive.archive(self.closed.id)
+        stale.save()
+        self.assertTrue(lifecycle.finalize(self.closed.id))
+        self.assertEqual(dict(FinalResult.objects.values_list('choice', 'votes')),
+                         {self.first.id: 2, self.second.id: 1})
+
+    def test_open_and_finalized_questions_are_skipped(self):
+        """Open questions and questions finalized before are not finalized."""
+        self.assertFalse(lifecycle.finalize(self.open.id))
+        self.assertTrue(lifecycle.finalize(self.closed.id))
+        self.assertFalse(lifecycle.finalize(self.closed.id))
+        self.assertEqual(lifecycle.finalize_due(), [])
+
+    def test_extending_reopens(self):
+        """Extending the end date of a finalized question drops its final counts."""
+        lifecycle.finalize(self.closed.id)
+        self.closed.refresh_from_db()
+        self.closed.end_date = timezone.now() + datetime.timedelta(days=1)
+        self.closed.save()
+        self.closed.refresh_from_db()
+        self.assertIsNone(self.closed.finalized_at)
+        self.assertFalse(FinalResult.objects.exists())
+
+    def test_next_closing(self):
+        """The next closing time is the earliest end date to finalize."""
+        self.assertEqual(lifecycle.next_closing(), self.open.end_date)
+
+    def test_command(self):
+        """The command finalizes due questions once."""
+        out = io.StringIO()
+        call_command('finalize_polls', stdout=out)
+        self.assertIn("Finalized 1 question(s).", out.getvalue())
@@ -0,0 +1,105 @@
+"""Tests for live results streams."""
+import datetime
+import json
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.cache import get_cache
+from polls.live import ResultsBroker, broker, stream_results
+from polls.models import Question
+
+
+def parse_events(response) -> list:
+    """Return the data of every results event in a streaming response."""
+    content = b"".join(response.streaming_content).decode()
+    return [json.loads(block.split("data: ", 1)[1]) for block in content.split("\n\n")
+            if block.startswith("event: results")]
+
+
+class ResultsBrokerTest(TestCase):
+    """Tests for the in-process publish/subscribe broker."""
+
+    def test_wait_times_out(self):
+        """Waiting without a publication returns the same version."""
+        results_broker = ResultsBroker()
+        self.assertEqual(results_broker.wait(1, 0, timeout=0.01), 0)
+
+    def test_publish_wakes_waiters(self):
+        """Publishing wakes a waiting subscriber with the new version."""
+        results_broker = ResultsBroker()
+        timer = threading.Timer(0.01, results_broker.publish, args=(1,))
+        timer.start()
+        self.assertEqual(results_broker.wait(1, 0, timeout=5), 1)
+        timer.join()
+
+
+@override_settings(POLLS_LIVE_RESULTS=True, POLLS_LIVE_MAX_DURATION=0)
+class ResultsStreamTest(TestCase):
+    """Tests for the results stream view."""
+
+    def setUp(self):
+        """Create an open question."""
+        get_cache().clear()
+        self.question = Question.objects.create(
+            question_text="Live question",
+            pub_date=timezone.now() - datetime.timedelta(days=1),
+            end_date=timezone.now() + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="Live choice")
+        self.url = reverse('polls:results-stream', args=(self.question.id,))
+
+    def test_stream_sends_results(self):
+        """The stream starts with the current results."""
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = parse_events(response)
+        self.assertEqual(events[0]['choices'][0]['choice_text'], "Live choice")
+
+    def test_unpublished_question(self):
+        """Unpublished questions have no stream."""
+        self.question.pub_date = timezone.now() + datetime.timedelta(days=1)
+        self.question.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_vote_publishes(self):
+        """A committed vote bumps the version of its question."""
+        User.objects.create_user(username="live", password="livePassword1")
+        self.client.login(username="live", password="livePassword1")
+        version = broker.version(self.question.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.id})
+        self.assertEqual(broker.version(self.question.id), version + 1)
+        self.assertEqual(parse_events(self.client.get(self.url))[0]['total'], 1)
+
+    def test_results_page_subscribes(self):
+        """The results page of an open question links to its stream."""
+        response = self.client.get(reverse('polls:results', args=(self.question.id,)))
+        self.assertContains(response, f'data-stream="{self.url}"')
+
+    @override_settings(POLLS_LIVE_INTERVAL=0.3, POLLS_LIVE_KEEPALIVE=0.05, POLLS_LIVE_MAX_DURATION=0.5)
+    def test_bursts_are_coalesced(self):
+        """A burst of votes costs one push per interval."""
+        def publish():
+            for _ in range(10):
+                broker.publish(self.question.id)
+                time.sleep(0.02)
+
+        events = stream_results(self.question)
+        # The retry delay and the current results.
+        next(events), next(events)
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        pushes = [block for block in events if block.startswith("event: results")]
+        publisher.join()
+        self.assertEqual(len(pushes), 2)
+
+    @override_settings(POLLS_LIVE_RESULTS=False)
+    def test_disabled(self):
+        """Without POLLS_LIVE_RESULTS, results pages do not subscribe and streams are not served."""
+        response = self.client.get(reverse('polls:results', args=(self.question.id,)))
+        self.assertNotContains(response, "data-stream")
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -0,0 +1,147 @@
+"""Tests for queued JSON logging and audit events."""
+import datetime
+import json
+import logging
+import logging.config
+import os
+import tempfile
+import threading
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from mysite.log import AuditFileHandler, JsonFormatter, QueueHandler
+from polls.models import Question
+
+
+class ListHandler(logging.Handler):
+    """Keep handled records, optionally waiting for `gate` first."""
+
+    def __init__(self, gate: threading.Event = None):
+        """Start without records."""
+        super().__init__()
+        self.gate = gate
+        self.records = []
+
+    def emit(self, record):
+        """Keep the record."""
+        if self.gate:
+            self.gate.wait(5)
+        self.records.append(record)
+
+
+def make_record(msg, *args, **extra):
+    """Return an INFO record of the "test" logger."""
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class JsonFormatterTest(SimpleTestCase):
+    """Tests for JsonFormatter."""
+
+    def test_format(self):
+        """Records become JSON with their message and extra fields."""
+        data = json.loads(JsonFormatter().format(make_record("%s voted", "user", event='vote')))
+        self.assertEqual(data['message'], "user voted")
+        self.assertEqual(data['event'], 'vote')
+        self.assertEqual((data['level'], data['logger']), ('INFO', 'test'))
+        self.assertNotIn('args', data)
+
+
+class QueueHandlerTest(SimpleTestCase):
+    """Tests for QueueHandler and its listener."""
+
+    def test_records_reach_targets(self):
+        """Queued records are handled by the targets once the listener stops."""
+        target = ListHandler()
+        handler = QueueHandler([target])
+        handler.handle(make_record("%d votes", 3))
+        handler.close()
+        self.assertEqual([record.msg for record in target.records], ["3 votes"])
+
+    def test_drop_policy(self):
+        """Records are dropped while the queue is full and the drop is reported."""
+        gate = threading.Event()
+        target = ListHandler(gate)
+        handler = QueueHandler([target], maxsize=2, batch_size=1)
+        for index in range(5):
+            handler.handle(make_record("record %d", index))
+        self.assertGreater(handler.dropped, 0)
+        gate.set()
+        handler.listener.queue.join()
+        handler.handle(make_record("after"))
+        handler.close()
+        messages = [record.getMessage() for record in target.records]
+        self.assertIn("after", messages)
+        self.assertIn(f"Dropped {handler.dropped} log records, the log queue was full.", messages)
+
+    def test_dict_config(self):
+        """Queue handlers send records to handlers configured before them in a LOGGING dict."""
+        target = ListHandler()
+        logger = logging.getLogger("tests.queued")
+        logging.config.dictConfig({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'handlers': {
+                'target': {'()': lambda: target},
+                'target_queue': {'()': QueueHandler, 'handlers': ['cfg://handlers.target']},
+            },
+            'loggers': {'tests.queued': {'handlers': ['target_queue'], 'level': 'INFO', 'propagate': False}},
+        })
+        try:
+            logger.info("queued %s", "message")
+        finally:
+            logger.handlers[0].close()
+            logger.handlers.clear()
+        self.assertEqual(target.records[0].getMessage(), "queued message")
+
+
+class AuditFileHandlerTest(SimpleTestCase):
+    """Tests for AuditFileHandler."""
+
+    def test_batch_rotates(self):
+        """Batches are written as JSON lines and rotated by size."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'audit.log')
+            handler = AuditFileHandler(path, maxBytes=300, backupCount=2, delay=True)
+            handler.setFormatter(JsonFormatter())
+            handler.handle_batch([make_record("event %d", index) for index in range(6)])
+            handler.close()
+            lines = []
+            for name in sorted(os.listdir(directory), reverse=True):
+                with open(os.path.join(directory, name)) as file:
+                    lines += [json.loads(line)['message'] for line in file]
+            self.assertIn('audit.log.1', os.listdir(directory))
+            self.assertEqual(lines[-1], "event 5")
+
+
+class AuditEventTest(TestCase):
+    """Tests for audit events of votes and logins."""
+
+    def setUp(self):
+        """Create a user and an open question."""
+        now = timezone.now()
+        self.question = Question.objects.create(question_text="Open question",
+                                                pub_date=now - datetime.timedelta(days=1),
+                                                end_date=now + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="Choice 1")
+        User.objects.create_user(username="voter", password="voterPassword1")
+
+    def test_vote_and_login_events(self):
+        """Logins and votes are logged to the audit logger with structured fields."""
+        with self.assertLogs("audit", level="INFO") as logs:
+            self.client.post(reverse('login'), {'username': "voter", 'password': "voterPassword1"})
+            self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.id})
+        self.assertEqual([record.event for record in logs.records], ['login', 'vote'])
+        self.assertEqual(logs.records[1].question_id, self.question.id)
+        self.assertEqual(logs.records[1].getMessage(), "voter voted in Open question.")
+
+    def test_client_chosen_ip_is_not_logged(self):
+        """Login events record the client IP seen by the rate limits, not one sent by the client."""
+        with self.assertLogs("audit", level="INFO") as logs:
+            self.client.post(reverse('login'), {'username': "voter", 'password': "voterPassword1"},
+                             HTTP_X_FORWARDED_FOR="10.0.0.1", REMOTE_ADDR="192.0.2.7")
+        self.assertEqual(logs.records[0].ip, "192.0.2.7")
@@ -0,0 +1,52 @@
+"""Tests for request metrics."""
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from mysite.middleware import MetricsStore, metrics, percentile
+
+
+class RequestMetricsTest(TestCase):
+    """Tests for RequestMetricsMiddleware and the metrics view."""
+
+    def setUp(self):
+        """Start without samples."""
+        metrics.clear()
+
+    def test_request_is_recorded(self):
+        """Each request adds a sample to its view."""
+        with self.assertLogs("mysite", level="INFO") as logs:
+            self.client.get(reverse('polls:index'))
+        summary = metrics.summary()['polls:index']
+        self.assertEqual(summary['count'], 1)
+        self.assertGreater(summary['queries']['p50'], 0)
+        self.assertGreater(summary['render_ms']['p50'], 0)
+        self.assertIn("view=polls:index", logs.output[-1])
+
+    def test_metrics_view_requires_staff(self):
+        """Only staff members can read the metrics."""
+        User.objects.create_user(username="member", password="memberPassword1")
+        self.client.login(username="member", password="memberPassword1")
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_metrics_view(self):
+        """Staff members get percentiles per view as JSON."""
+        User.objects.create_user(username="staff", password="staffPassword1", is_staff=True)
+        self.client.login(username="staff", password="staffPassword1")
+        self.client.get(reverse('polls:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('polls:index', response.json()['views'])
+        self.assertIn('hits', response.json()['results_cache'])
+
+    def test_percentiles(self):
+        """Percentiles use the nearest rank of the samples."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+        store = MetricsStore(size=2)
+        for total in (1, 2, 3):
+            store.record('view', {'queries': 1, 'db_ms': 0, 'render_ms': 0, 'total_ms': total})
+        self.assertEqual(store.summary()['view']['count'], 2)
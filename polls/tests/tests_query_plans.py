@@ -0,0 +1,84 @@
+"""Query plan regression tests for the hot queries of poll application."""
+import datetime
+import re
+import unittest
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.cache import get_cache
+from polls.models import Question, Vote
+
+# A plan line like "SCAN polls_vote" reads the whole table. Index scans are
+# reported as "SCAN polls_vote USING INDEX ..." and are accepted.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>polls_\w+)( AS \w+)?$')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN is SQLite specific")
+class QueryPlanTest(TestCase):
+    """Fail when a query used by the poll views scans a whole polls table."""
+
+    def setUp(self):
+        """Create a question with choices and a voter."""
+        get_cache().clear()
+        self.question = Question.objects.create(
+            question_text="Plan question",
+            pub_date=timezone.now() - datetime.timedelta(days=1),
+            end_date=timezone.now() + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="Choice 1")
+        self.question.choice_set.create(choice_text="Choice 2")
+        self.user = User.objects.create_user(username="planner", password="plannerPassword1")
+        Vote.objects.cast(self.user, self.choice)
+
+    def full_scans(self, queries):
+        """Return plan lines of captured SELECT queries that scan a polls table."""
+        scans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'polls_' not in sql:
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                for row in cursor.fetchall():
+                    if FULL_SCAN.match(row[-1]):
+                        scans.append(f"{row[-1]} in {sql}")
+        return scans
+
+    def assertNoFullScan(self, method, url, **kwargs):
+        """Request `url` and assert that no captured query scans a polls table."""
+        with CaptureQueriesContext(connection) as context:
+            getattr(self.client, method)(url, **kwargs)
+        self.assertTrue(context.captured_queries)
+        self.assertEqual(self.full_scans(context.captured_queries), [])
+
+    def test_index_view(self):
+        """The index lists questions using the publication date index."""
+        self.assertNoFullScan('get', reverse('polls:index'))
+
+    def test_index_view_next_page(self):
+        """Deeper index pages use the (pub_date, id) index."""
+        self.assertNoFullScan('get', reverse('polls:index'), data={'state': 'open', 'before': '1700000000000000_5'})
+
+    def test_detail_view(self):
+        """The detail page looks questions and choices up by key."""
+        self.assertNoFullScan('get', reverse('polls:detail', args=(self.question.id,)))
+
+    def test_results_view(self):
+        """The results page looks questions and choices up by key."""
+        self.assertNoFullScan('get', reverse('polls:results', args=(self.question.id,)))
+
+    def test_vote(self):
+        """Voting looks up the previous vote with the (voter, question) index."""
+        self.client.login(username="planner", password="plannerPassword1")
+        choice = self.question.choice_set.last()
+        self.assertNoFullScan('post', reverse('polls:vote', args=(self.question.id,)), data={"choice": choice.id})
+
+    def test_detector(self):
+        """The check reports a query that reads a whole table."""
+        with CaptureQueriesContext(connection) as context:
+            list(Question.objects.filter(question_text="Plan question"))
+        self.assertEqual(len(self.full_scans(context.captured_queries)), 1)
@@ -1,5 +1,6 @@
 """Tests for poll application."""
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.urls import reverse
 import datetime
@@ -78,6 +79,42 @@ class QuestionModelTest(TestCase):
         self.assertIs(future_question.can_vote(), False)
 
 
+class QuestionQuerySetTest(TestCase):
+    """Tests for question states computed in SQL."""
+
+    def setUp(self):
+        """Create a future, an open and a closed question."""
+        now = timezone.now()
+        self.now = now
+        self.future = Question.objects.create(question_text="Future", pub_date=now + datetime.timedelta(days=1),
+                                              end_date=now + datetime.timedelta(days=2))
+        self.open = Question.objects.create(question_text="Open", pub_date=now - datetime.timedelta(hours=1),
+                                            end_date=now + datetime.timedelta(days=1))
+        self.closed = Question.objects.create(question_text="Closed", pub_date=now - datetime.timedelta(days=3),
+                                              end_date=now - datetime.timedelta(days=2))
+
+    def test_filters(self):
+        """published(), open() and closed() select questions by state at `now`."""
+        self.assertQuerysetEqual(Question.objects.published(self.now).order_by('id'), [self.open, self.closed])
+        self.assertQuerysetEqual(Question.objects.open(self.now), [self.open])
+        self.assertQuerysetEqual(Question.objects.closed(self.now), [self.closed])
+        self.assertQuerysetEqual(Question.objects.in_state('all', self.now).order_by('id'), [self.open, self.closed])
+
+    def test_with_state_matches_methods(self):
+        """Annotated states agree with can_vote() and was_published_recently()."""
+        for question in Question.objects.with_state(self.now):
+            self.assertEqual(question.is_open, question.can_vote(self.now))
+            self.assertEqual(question.published_recently, question.was_published_recently(self.now))
+
+    def test_admin_state_filter(self):
+        """The admin lists questions by state with annotated columns."""
+        User.objects.create_superuser(username="admin", password="adminPassword1")
+        self.client.login(username="admin", password="adminPassword1")
+        response = self.client.get(reverse('admin:polls_question_changelist'), {'state': 'closed'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.closed])
+        self.assertIs(response.context['cl'].result_list[0].is_open, False)
+
+
 class QuestionIndexViewTest(TestCase):
     """Tests for questions index view."""
 
@@ -141,6 +178,55 @@ class QuestionIndexViewTest(TestCase):
         )
 
 
+@override_settings(POLLS_INDEX_PAGE_SIZE=3)
+class QuestionIndexPaginationTest(TestCase):
+    """Tests for keyset pagination and state tabs of the index."""
+
+    def setUp(self):
+        """Create seven past questions, the three newest are still open."""
+        self.questions = [create_question(question_text=f"Question {i}", days=-i - 1) for i in range(7)]
+        for question in self.questions[:3]:
+            question.end_date = timezone.now() + datetime.timedelta(days=1)
+            question.save()
+
+    def get_page(self, **params):
+        """Return the index response for the query parameters."""
+        return self.client.get(reverse('polls:index'), params)
+
+    def test_pages(self):
+        """Following the next cursors walks through every question once."""
+        response = self.get_page()
+        self.assertEqual(list(response.context['latest_question_list']), self.questions[:3])
+        self.assertIsNone(response.context['previous_cursor'])
+        response = self.get_page(before=response.context['next_cursor'])
+        self.assertEqual(list(response.context['latest_question_list']), self.questions[3:6])
+        response = self.get_page(before=response.context['next_cursor'])
+        self.assertEqual(list(response.context['latest_question_list']), self.questions[6:])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_previous_page(self):
+        """The previous cursor leads back to the newer page."""
+        second = self.get_page(before=self.get_page().context['next_cursor'])
+        response = self.get_page(after=second.context['previous_cursor'])
+        self.assertEqual(list(response.context['latest_question_list']), self.questions[:3])
+        self.assertIsNone(response.context['previous_cursor'])
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_invalid_cursor(self):
+        """An invalid cursor shows the first page."""
+        response = self.get_page(before="not-a-cursor")
+        self.assertEqual(list(response.context['latest_question_list']), self.questions[:3])
+
+    def test_state_tabs(self):
+        """Open and closed tabs filter questions by their end date."""
+        response = self.get_page(state='open')
+        self.assertEqual(list(response.context['latest_question_list']), self.questions[:3])
+        self.assertTrue(all(question.is_open for question in response.context['latest_question_list']))
+        response = self.get_page(state='closed')
+        self.assertEqual(list(response.context['latest_question_list']), self.questions[3:6])
+        self.assertFalse(any(question.is_open for question in response.context['latest_question_list']))
+
+
 class QuestionDetailViewTest(TestCase):
     """Tests for questions detail view."""
 
@@ -189,3 +275,25 @@ class QuestionResultViewTest(TestCase):
         url = reverse('polls:results', args=(past_question.id,))
         response = self.client.get(url)
         self.assertContains(response, past_question.question_text)
+
+    def test_results_precomputed(self):
+        """Results include counts, percentages, total and the leading choice."""
+        question = create_question(question_text="Past question", days=-1)
+        question.choice_set.create(choice_text="Choice 1", votes=1)
+        leader = question.choice_set.create(choice_text="Choice 2", votes=3)
+        url = reverse('polls:results', args=(question.id,))
+        response = self.client.get(url)
+        results = response.context['results']
+        self.assertEqual(results['total'], 4)
+        self.assertEqual([choice['percentage'] for choice in results['choices']], [25, 75])
+        self.assertEqual(results['leader']['id'], leader.id)
+        self.assertContains(response, '<span class="leader-text">Choice 2</span>')
+
+    def test_results_query_count(self):
+        """The number of queries does not depend on the number of choices."""
+        question = create_question(question_text="Past question", days=-1)
+        for i in range(10):
+            question.choice_set.create(choice_text=f"Choice {i}", votes=i)
+        url = reverse('polls:results', args=(question.id,))
+        with self.assertNumQueries(2):
+            self.client.get(url)
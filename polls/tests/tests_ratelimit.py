@@ -0,0 +1,106 @@
+"""Tests for rate limiting of votes and logins."""
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mysite import ratelimit
+from polls.models import Question
+
+LIMITS = {
+    'polls:vote': {'ip': '100/60', 'user': '2/60'},
+    'login': {'ip': '3/60', 'user': '2/60'},
+    'signup': {'ip': '2/60'},
+}
+
+
+class TakeTest(TestCase):
+    """Tests for the token bucket."""
+
+    def setUp(self):
+        """Clear the buckets."""
+        caches['default'].clear()
+
+    def test_bucket_refills(self):
+        """Tokens are taken until the bucket is empty and refill over time."""
+        self.assertEqual(ratelimit.take('key', '2/10', now=100), 0)
+        self.assertEqual(ratelimit.take('key', '2/10', now=100), 0)
+        self.assertAlmostEqual(ratelimit.take('key', '2/10', now=101), 4)
+        self.assertEqual(ratelimit.take('key', '2/10', now=105), 0)
+
+
+@override_settings(RATE_LIMITS=LIMITS, RATE_LIMIT_ENABLED=True)
+class RateLimitMiddlewareTest(TestCase):
+    """Tests for RateLimitMiddleware."""
+
+    def setUp(self):
+        """Create an open question and clear the buckets."""
+        caches['default'].clear()
+        now = timezone.now()
+        self.question = Question.objects.create(question_text="Open question",
+                                                pub_date=now - datetime.timedelta(days=1),
+                                                end_date=now + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="Choice 1")
+        User.objects.create_user(username="voter", password="voterPassword1")
+
+    def test_votes_are_limited_per_user(self):
+        """A user gets a 429 without queries once their bucket is empty."""
+        self.client.login(username="voter", password="voterPassword1")
+        url = reverse('polls:vote', args=(self.question.id,))
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'choice': self.choice.id}).status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'choice': self.choice.id})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_logins_are_limited_per_username_and_ip(self):
+        """Password guesses are limited per username and per client IP."""
+        url = reverse('login')
+        for _ in range(2):
+            self.client.post(url, {'username': "Voter", 'password': "wrong"})
+        self.assertEqual(self.client.post(url, {'username': "voter", 'password': "voterPassword1"}).status_code, 429)
+        self.assertEqual(self.client.post(url, {'username': "other", 'password': "wrong"}).status_code, 429)
+        other_ip = self.client.post(url, {'username': "other", 'password': "wrong"}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other_ip.status_code, 200)
+
+    def test_other_ip_can_log_in(self):
+        """Guesses from one IP do not lock the account owner out on another IP."""
+        url = reverse('login')
+        for _ in range(2):
+            self.client.post(url, {'username': "voter", 'password': "wrong"})
+        self.assertEqual(self.client.post(url, {'username': "voter", 'password': "wrong"}).status_code, 429)
+        response = self.client.post(url, {'username': "voter", 'password': "voterPassword1"}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+
+    def test_spoofed_forwarded_for_is_ignored(self):
+        """A client cannot get a fresh IP bucket by sending its own X-Forwarded-For."""
+        url = reverse('signup')
+        statuses = [self.client.post(url, {'username': "x"}, HTTP_X_FORWARDED_FOR=f"10.1.0.{index}").status_code
+                    for index in range(3)]
+        self.assertEqual(statuses[-1], 429)
+
+    @override_settings(RATE_LIMIT_TRUSTED_PROXIES=1)
+    def test_trusted_proxy(self):
+        """Behind a trusted proxy the client IP is the entry the proxy appended."""
+        url = reverse('signup')
+        for _ in range(2):
+            self.client.post(url, {'username': "x"}, HTTP_X_FORWARDED_FOR="1.1.1.1, 10.0.0.1")
+        blocked = self.client.post(url, {'username': "x"}, HTTP_X_FORWARDED_FOR="2.2.2.2, 10.0.0.1")
+        other_client = self.client.post(url, {'username': "x"}, HTTP_X_FORWARDED_FOR="10.0.0.2")
+        self.assertEqual(blocked.status_code, 429)
+        self.assertEqual(other_client.status_code, 200)
+
+    def test_get_is_not_limited(self):
+        """Only POST requests take tokens."""
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('login')).status_code, 200)
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        """No request is limited when rate limiting is disabled."""
+        for _ in range(4):
+            self.assertNotEqual(self.client.post(reverse('login'), {'username': "voter"}).status_code, 429)
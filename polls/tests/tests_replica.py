@@ -0,0 +1,155 @@
+"""Tests for read-replica routing."""
+import datetime
+import io
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mysite import routers
+from mysite.middleware import ReplicaMiddleware
+from polls.cache import get_cache, get_results
+from polls.models import Question, Vote
+
+
+@override_settings(DATABASE_REPLICA='replica')
+class ReplicaRouterTest(SimpleTestCase):
+    """Tests for ReplicaRouter."""
+
+    def setUp(self):
+        """Create a router."""
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_inside_replica_reads(self):
+        """Poll models are read from the replica only inside replica_reads()."""
+        self.assertEqual(self.router.db_for_read(Question), 'default')
+        with routers.replica_reads():
+            self.assertEqual(self.router.db_for_read(Question), 'replica')
+            self.assertIsNone(self.router.db_for_read(User))
+
+    def test_writes_go_to_default(self):
+        """Poll models are always written to the default database."""
+        with routers.replica_reads():
+            self.assertEqual(self.router.db_for_write(Question), 'default')
+
+    def test_replica_is_not_migrated(self):
+        """The replica is a copy and is never migrated."""
+        self.assertIs(self.router.allow_migrate('replica', 'polls'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'polls'))
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_without_replica(self):
+        """Without a replica every read uses the default database."""
+        with routers.replica_reads():
+            self.assertIsNone(self.router.db_for_read(Question))
+
+
+@override_settings(DATABASE_REPLICA='replica', REPLICA_PIN_SECONDS=10)
+class ReplicaMiddlewareTest(SimpleTestCase):
+    """Tests for ReplicaMiddleware."""
+
+    def setUp(self):
+        """Wrap a view that records whether replica reads were enabled."""
+        self.factory = RequestFactory()
+        self.replica_reads = None
+
+        def view(request):
+            self.replica_reads = routers._replica_reads.get()
+            return HttpResponse()
+
+        self.middleware = ReplicaMiddleware(view)
+
+    def test_safe_request_uses_replica(self):
+        """Reads of GET requests may use the replica."""
+        response = self.middleware(self.factory.get('/polls/'))
+        self.assertIs(self.replica_reads, True)
+        self.assertNotIn('pin_primary', response.cookies)
+        self.assertIs(routers._replica_reads.get(), False)
+
+    def test_write_pins_to_primary(self):
+        """A POST request uses the default database and pins the client to it."""
+        response = self.middleware(self.factory.post('/polls/1/vote/'))
+        self.assertIs(self.replica_reads, False)
+        self.assertEqual(response.cookies['pin_primary']['max-age'], 10)
+
+    def test_pinned_client_reads_primary(self):
+        """Pinned clients read from the default database."""
+        request = self.factory.get('/polls/')
+        request.COOKIES['pin_primary'] = '1'
+        self.middleware(request)
+        self.assertIs(self.replica_reads, False)
+
+
+class SyncReplicaTest(TransactionTestCase):
+    """Tests for the sync_replica command."""
+
+    def test_copies_database(self):
+        """The replica file receives the committed rows."""
+        now = timezone.now()
+        Question.objects.create(question_text="Replicated", pub_date=now, end_date=now + datetime.timedelta(days=1))
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, 'replica.sqlite3')
+            call_command('sync_replica', output=target, stdout=io.StringIO())
+            replica = sqlite3.connect(target)
+            try:
+                rows = replica.execute("SELECT question_text FROM polls_question").fetchall()
+            finally:
+                replica.close()
+        self.assertEqual(rows, [("Replicated",)])
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_requires_replica(self):
+        """Without a replica or --output the command fails."""
+        with self.assertRaises(CommandError):
+            call_command('sync_replica', stdout=io.StringIO())
+
+
+@override_settings(DATABASE_REPLICA='replica', REPLICA_PIN_SECONDS=10)
+class LaggingReplicaTest(TransactionTestCase):
+    """Tests with a replica file that does not receive new votes."""
+
+    def setUp(self):
+        """Copy the database to a replica file and register it as the replica."""
+        get_cache().clear()
+        now = timezone.now()
+        self.question = Question.objects.create(question_text="Replicated", pub_date=now - datetime.timedelta(days=1),
+                                                end_date=now + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="Choice 1")
+        User.objects.create_user(username="voter", password="voterPassword1")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'replica.sqlite3')
+        call_command('sync_replica', output=path, stdout=io.StringIO())
+        connections.settings['replica'] = dict(connections['default'].settings_dict, NAME=path)
+        self.addCleanup(self.remove_replica)
+        self.results_url = reverse('polls:results', args=(self.question.id,))
+
+    @staticmethod
+    def remove_replica():
+        """Close and unregister the replica."""
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+
+    def test_voter_reads_own_vote(self):
+        """Caches filled by unpinned clients during lag do not hide a vote from the pinned voter."""
+        unpinned = Client()
+        unpinned.get(self.results_url)
+        voter = Client()
+        voter.login(username="voter", password="voterPassword1")
+        response = voter.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.id})
+        self.assertIn('pin_primary', response.cookies)
+        self.assertEqual(Vote.objects.using('replica').count(), 0)
+
+        # Unpinned reads use the lagging replica but fill caches from the primary.
+        self.assertEqual(unpinned.get(self.results_url).status_code, 200)
+        self.assertEqual(unpinned.get(reverse('polls:index')).status_code, 200)
+        self.assertContains(voter.get(self.results_url), '<td class="total">1</td>')
+        self.assertEqual(get_results(Question.objects.get())['total'], 1)
@@ -0,0 +1,69 @@
+"""Tests for the results cache."""
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.cache import cache_stats, get_cache, get_results, invalidate_results, reset_cache_stats
+from polls.models import Question, Vote
+
+
+class ResultsCacheTest(TestCase):
+    """Tests for read-through caching of results."""
+
+    def setUp(self):
+        """Create an open question and clear the cache."""
+        get_cache().clear()
+        reset_cache_stats()
+        self.question = Question.objects.create(
+            question_text="Cached question",
+            pub_date=timezone.now() - datetime.timedelta(days=1),
+            end_date=timezone.now() + datetime.timedelta(days=1))
+        self.choice = self.question.choice_set.create(choice_text="Choice 1")
+        self.results_url = reverse('polls:results', args=(self.question.id,))
+
+    def test_second_read_is_a_hit(self):
+        """The second read is served from the cache without querying choices."""
+        get_results(self.question)
+        with self.assertNumQueries(0):
+            get_results(self.question)
+        stats = cache_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_results_view_uses_cache(self):
+        """A cached results page only queries the question."""
+        self.client.get(self.results_url)
+        with self.assertNumQueries(1):
+            self.client.get(self.results_url)
+
+    def test_vote_invalidates_results(self):
+        """Voting drops cached results of the question."""
+        User.objects.create_user(username="voter", password="voterPassword1")
+        self.client.login(username="voter", password="voterPassword1")
+        self.assertEqual(get_results(self.question)['total'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('polls:vote', args=(self.question.id,)), data={"choice": self.choice.id})
+        self.assertEqual(get_results(Question.objects.get(pk=self.question.pk))['total'], 1)
+
+    def test_stale_fill_is_not_served(self):
+        """Results counted before a vote and cached after its invalidation are not served."""
+        stale = self.question.get_results()
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.cast(User.objects.create_user(username="voter"), self.choice)
+            transaction.on_commit(lambda: invalidate_results(self.question.id))
+        # A read that loaded the question before the vote fills the cache late.
+        with mock.patch.object(Question, 'get_results', return_value=stale):
+            get_results(self.question)
+        self.assertEqual(get_results(Question.objects.get(pk=self.question.pk))['total'], 1)
+
+    def test_choice_change_invalidates_results(self):
+        """Editing choices drops cached results of the question."""
+        get_results(self.question)
+        self.question.choice_set.create(choice_text="Choice 2")
+        self.assertEqual(len(get_results(self.question)['choices']), 2)
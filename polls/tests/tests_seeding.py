@@ -0,0 +1,105 @@
+"""Tests for bulk data seeding."""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from polls import seeding
+from polls.models import Choice, Question, Vote
+
+RECORDS = [
+    {'model': 'question', 'id': 10, 'question_text': "Imported question",
+     'pub_date': "2021-09-01T04:55:12Z", 'end_date': "2021-09-30T06:41:24Z"},
+    {'model': 'choice', 'id': 20, 'question': 10, 'choice_text': "Yes"},
+    {'model': 'choice', 'id': 21, 'question': 10, 'choice_text': "No"},
+    {'model': 'user', 'id': 30, 'username': "imported"},
+    {'model': 'vote', 'voter': 30, 'choice': 21},
+]
+
+
+class SeedingTest(TestCase):
+    """Tests for seed_polls imports and generated data."""
+
+    def assertImported(self):
+        """Assert that RECORDS are in the database with counters."""
+        self.assertEqual(Question.objects.get(pk=10).question_text, "Imported question")
+        self.assertEqual(Choice.objects.get(pk=21).votes, 1)
+        self.assertEqual(Vote.objects.get().question_id, 10)
+        self.assertFalse(User.objects.get(pk=30).has_usable_password())
+
+    def test_import_jsonl(self):
+        """Records are imported from a JSONL file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'polls.jsonl')
+            with open(path, 'w') as file:
+                file.writelines(json.dumps(record) + "\n" for record in RECORDS)
+            call_command('seed_polls', path, stdout=StringIO())
+        self.assertImported()
+
+    def test_import_vote_on_missing_choice(self):
+        """The command reports votes on choices that do not exist."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'polls.jsonl')
+            with open(path, 'w') as file:
+                file.write(json.dumps({'model': 'vote', 'voter': 30, 'choice': 99}) + "\n")
+            with self.assertRaisesMessage(CommandError, "Choice 99 does not exist."):
+                call_command('seed_polls', path, stdout=StringIO())
+
+    def test_import_csv(self):
+        """Records are imported from CSV files of a directory."""
+        with tempfile.TemporaryDirectory() as directory:
+            for model in seeding.MODELS:
+                rows = [record for record in RECORDS if record['model'] == model]
+                columns = [key for key in rows[0] if key != 'model']
+                with open(os.path.join(directory, seeding.CSV_FILES[model]), 'w') as file:
+                    file.write(",".join(columns) + "\n")
+                    file.writelines(",".join(str(row[column]) for column in columns) + "\n" for row in rows)
+            call_command('seed_polls', directory, stdout=StringIO())
+        self.assertImported()
+
+    def test_generate(self):
+        """Generated data has unique votes and consistent counters."""
+        out = StringIO()
+        call_command('seed_polls', questions=5, choices=3, users=4, votes=30, batch_size=7, stdout=out)
+        self.assertIn("5 question(s), 15 choice(s), 4 user(s), 20 vote(s)", out.getvalue())
+        self.assertEqual(sum(Choice.objects.values_list('votes', flat=True)), 20)
+        # The generated rows do not collide with later inserts.
+        Question.objects.create(question_text="New", pub_date="2021-01-01T00:00Z", end_date="2021-01-02T00:00Z")
+
+    def test_votes_on_loaded_choices(self):
+        """Questions of choices loaded before are read once per chunk of votes."""
+        seeding.seed(RECORDS[:4])
+        voters = [{'model': 'user', 'id': 40 + index, 'username': f"voter{index}"} for index in range(4)]
+        votes = [{'model': 'vote', 'voter': 40 + index, 'choice': 20 + index % 2} for index in range(4)]
+        with CaptureQueriesContext(connection) as queries:
+            seeding.seed(voters + votes)
+        self.assertEqual(len([query for query in queries if 'FROM "polls_choice"' in query['sql']]), 1)
+        self.assertEqual(dict(Choice.objects.values_list('id', 'votes')), {20: 2, 21: 2})
+
+    def test_vote_on_missing_choice(self):
+        """Votes on choices that do not exist are rejected."""
+        with self.assertRaises(Choice.DoesNotExist):
+            seeding.seed([{'model': 'vote', 'voter': 30, 'choice': 99}])
+
+
+class SeedingIndexTest(TransactionTestCase):
+    """Tests for loading with indexes dropped, which needs DDL outside a transaction."""
+
+    def test_drop_indexes(self):
+        """Indexes are rebuilt after the load."""
+        seeding.seed(seeding.generate_records(3, 2, 3, 5), drop_indexes=True)
+        self.assertEqual(Vote.objects.count(), 5)
+        self.assertIn('polls_question_pub_id_idx', self.index_names(Question))
+        self.assertTrue(any('choice_id' in name for name in self.index_names(Vote)))
+
+    @staticmethod
+    def index_names(model):
+        """Return names of indexes on the model's table."""
+        with connection.cursor() as cursor:
+            return list(connection.introspection.get_constraints(cursor, model._meta.db_table))
@@ -0,0 +1,96 @@
+"""Tests for denormalized vote counters."""
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from django.utils import timezone
+
+from polls.cache import get_cache, get_results
+from polls.models import Question, Vote
+
+
+class VoteCounterTest(TestCase):
+    """Tests for Vote.objects.cast() and the recount_votes command."""
+
+    def setUp(self):
+        """Create a question with two choices and two users."""
+        self.question = Question.objects.create(
+            question_text="Counter question",
+            pub_date=timezone.now(),
+            end_date=timezone.now() + datetime.timedelta(days=1))
+        self.choice_1 = self.question.choice_set.create(choice_text="Choice 1")
+        self.choice_2 = self.question.choice_set.create(choice_text="Choice 2")
+        self.user_1 = User.objects.create_user(username="voter1", password="voterPassword1")
+        self.user_2 = User.objects.create_user(username="voter2", password="voterPassword2")
+
+    def assertVotes(self, choice, expected):
+        """Assert the stored counter of `choice` after reloading it."""
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, expected)
+
+    def test_cast_new_votes(self):
+        """Each new vote increases the counter of its choice."""
+        Vote.objects.cast(self.user_1, self.choice_1)
+        Vote.objects.cast(self.user_2, self.choice_1)
+        self.assertVotes(self.choice_1, 2)
+        self.assertVotes(self.choice_2, 0)
+
+    def test_cast_switch_choice(self):
+        """Switching choice moves the count from the old choice to the new one."""
+        Vote.objects.cast(self.user_1, self.choice_1)
+        Vote.objects.cast(self.user_1, self.choice_2)
+        self.assertVotes(self.choice_1, 0)
+        self.assertVotes(self.choice_2, 1)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_cast_same_choice_again(self):
+        """Voting for the same choice again keeps a single vote."""
+        Vote.objects.cast(self.user_1, self.choice_1)
+        vote = Vote.objects.cast(self.user_1, self.choice_1)
+        self.assertEqual(vote.question, self.question)
+        self.assertEqual(Vote.objects.count(), 1)
+        self.assertVotes(self.choice_1, 1)
+
+    def test_deleting_voter_retracts_votes(self):
+        """Deleting a user takes their cascaded votes off the counters and cached results."""
+        get_cache().clear()
+        Vote.objects.cast(self.user_1, self.choice_1)
+        Vote.objects.cast(self.user_2, self.choice_1)
+        self.assertEqual(get_results(self.question)['total'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user_1.delete()
+        self.assertVotes(self.choice_1, 1)
+        self.assertEqual(Vote.objects.count(), 1)
+        self.assertEqual(get_results(Question.objects.get(pk=self.question.pk))['total'], 1)
+
+    def test_one_vote_per_question(self):
+        """The database rejects a second vote of a user on the same question."""
+        Vote.objects.create(voter=self.user_1, choice=self.choice_1)
+        with self.assertRaises(IntegrityError):
+            Vote.objects.create(voter=self.user_1, choice=self.choice_2)
+
+    def test_recount_fixes_drift(self):
+        """recount_votes rebuilds counters from the Vote table."""
+        Vote.objects.create(voter=self.user_1, choice=self.choice_1)
+        out = StringIO()
+        call_command('recount_votes', stdout=out)
+        self.assertIn("stored 0, actual 1", out.getvalue())
+        self.assertVotes(self.choice_1, 1)
+
+    def test_recount_check_only_reports(self):
+        """recount_votes --check reports drift without fixing it."""
+        Vote.objects.create(voter=self.user_1, choice=self.choice_1)
+        out = StringIO()
+        call_command('recount_votes', '--check', stdout=out)
+        self.assertIn("1 vote counter(s) drifted", out.getvalue())
+        self.assertVotes(self.choice_1, 0)
+
+    def test_recount_consistent(self):
+        """recount_votes reports consistent counters."""
+        Vote.objects.cast(self.user_1, self.choice_1)
+        out = StringIO()
+        call_command('recount_votes', stdout=out)
+        self.assertIn("All vote counters are consistent.", out.getvalue())
@@ -1,12 +1,29 @@
 """URL configuration for poll application."""
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_views, views
 
 app_name = 'polls'
-urlpatterns = [
+sync_urlpatterns = [
     path('', views.IndexView.as_view(), name='index'),
     path('<int:pk>/', views.DetailView.as_view(), name='detail'),
     path('<int:pk>/results/', views.ResultsView.as_view(), name='results'),
+    path('<int:pk>/results/stream/', views.results_stream, name='results-stream'),
     path('<int:question_id>/vote/', views.vote, name='vote')
 ]
+async_urlpatterns = [
+    path('', async_views.index, name='index'),
+    path('<int:pk>/', async_views.detail, name='detail'),
+    path('<int:pk>/results/', async_views.results, name='results'),
+    # No results stream: Django 3.2 iterates streaming responses in the event
+    # loop under ASGI, where the stream's waits and queries would block it.
+    path('<int:question_id>/vote/', async_views.vote, name='vote')
+]
+api_urlpatterns = [
+    path('api/questions/', api.question_list, name='api-questions'),
+    path('api/questions/<int:pk>/', api.question_detail, name='api-question'),
+    path('api/questions/<int:pk>/results/', api.question_results, name='api-results'),
+    path('api/export/', api.export, name='api-export'),
+]
+urlpatterns = (async_urlpatterns if settings.POLLS_ASYNC_VIEWS else sync_urlpatterns) + api_urlpatterns
@@ -1,31 +1,139 @@
 """Views for poll application."""
+import datetime
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import Http404
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.safestring import mark_safe
 from django.contrib import messages
-from django.contrib.auth.models import User
+from . import http_cache
+from .cache import get_cache, get_results, invalidate_results
+from .ingest import get_vote_buffer
+from .live import broker, stream_results
 from .models import Question, Choice, Vote
 from django.views import generic
+from mysite.routers import primary_reads
 import logging
 
-logger = logging.getLogger("polls")
+audit = logging.getLogger("audit")
+
+CURSOR_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class RequestTimeMixin:
+    """Evaluate the state of questions at the moment the request started."""
+
+    def setup(self, request, *args, **kwargs):
+        """Record the current time as `now`."""
+        super().setup(request, *args, **kwargs)
+        self.now = timezone.now()
 
 
 # Create your views here.
-class IndexView(generic.ListView):
-    """Display latest questions."""
+class IndexView(RequestTimeMixin, generic.ListView):
+    """Display latest questions.
+
+    Questions are paginated with a keyset on (pub_date, id): `before` and
+    `after` query parameters hold the cursor of the last or first question
+    of the neighbouring page, so every page costs the same. The `state`
+    query parameter filters open or closed questions.
+
+    The question list is rendered from `list_template_name` and cached until
+    the next question is published or closes. Only the greeting and messages
+    are rendered per request, and pages of anonymous users without messages
+    may be cached by browsers and proxies until then.
+    """
 
     template_name = 'polls/index.html'
+    list_template_name = 'polls/question_list.html'
     context_object_name = 'latest_question_list'
+    states = ('all', 'open', 'closed')
+
+    def get(self, request, *args, **kwargs):
+        """Render the index around the cached question list."""
+        response = self.render_to_response(self.get_page_context())
+        return self.add_cache_headers(response)
+
+    def get_page_context(self) -> dict:
+        """Return the context of the page with the rendered question list.
+
+        The queryset is only evaluated when the question list is not cached.
+        """
+        state = self.get_state()
+        key = http_cache.index_fragment_key(state, decode_cursor(self.request.GET.get('before')),
+                                            decode_cursor(self.request.GET.get('after')))
+        html = get_cache().get(key)
+        # The page is rendered without the list when it is cached.
+        self.object_list = None
+        context = {}
+        if html is None:
+            # The list is cached for every client, so it is read from the primary.
+            with primary_reads():
+                self.object_list = self.get_queryset()
+                context = self.get_context_data()
+                html = render_to_string(self.list_template_name, context)
+            get_cache().set(key, html, http_cache.page_timeout(http_cache.next_transition(self.now), self.now))
+        context['question_list_html'] = mark_safe(html)
+        # Whether the response is the same for every anonymous visitor.
+        self.shared = not self.request.user.is_authenticated and not len(messages.get_messages(self.request))
+        return context
+
+    def add_cache_headers(self, response):
+        """Let shared caches keep the page until the next transition if it is not personal."""
+        if not self.shared:
+            return http_cache.patch_private_cache(response)
+        return http_cache.patch_shared_cache(response, http_cache.page_timeout(http_cache.next_transition()))
+
+    def get_state(self) -> str:
+        """Return the requested state filter."""
+        self.state = self.request.GET.get('state')
+        if self.state not in self.states:
+            self.state = 'all'
+        return self.state
 
     def get_queryset(self):
-        """Return all available questions."""
-        return Question.objects.filter(pub_date__lte=timezone.now()).order_by('-pub_date')
+        """Return one page of available questions."""
+        questions = Question.objects.in_state(self.get_state(), self.now).with_state(self.now)
+
+        size = settings.POLLS_INDEX_PAGE_SIZE
+        before = decode_cursor(self.request.GET.get('before'))
+        after = decode_cursor(self.request.GET.get('after'))
+        if after:
+            pub_date, pk = after
+            page = list(questions.filter(Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk))
+                        .order_by('pub_date', 'id')[:size + 1])
+            self.has_previous = len(page) > size
+            self.has_next = True
+            page = page[:size][::-1]
+        else:
+            if before:
+                pub_date, pk = before
+                questions = questions.filter(Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk))
+            page = list(questions.order_by('-pub_date', '-id')[:size + 1])
+            self.has_previous = before is not None
+            self.has_next = len(page) > size
+            page = page[:size]
+        return page
+
+    def get_context_data(self, **kwargs):
+        """Add the state filter and cursors of the neighbouring pages."""
+        context = super().get_context_data(**kwargs)
+        page = context['object_list']
+        context['state'] = self.state
+        context['states'] = self.states
+        context['fragment_timeout'] = settings.POLLS_FRAGMENT_CACHE_TIMEOUT
+        context['next_cursor'] = encode_cursor(page[-1]) if page and self.has_next else None
+        context['previous_cursor'] = encode_cursor(page[0]) if page and self.has_previous else None
+        return context
 
 
-class DetailView(generic.DetailView):
+class DetailView(RequestTimeMixin, generic.DetailView):
     """Question detail page."""
 
     model = Question
@@ -40,10 +148,13 @@ class DetailView(generic.DetailView):
         with an error message.
 
         """
+        if http_cache.get_results_page(kwargs['pk']) is not None:
+            # Only closed questions have a cached results page.
+            return closed_redirect(kwargs['pk'])
         try:
             self.object = self.get_object()
-            if not self.object.can_vote():
-                return redirect(reverse('polls:results', args=(self.object.id,)))
+            if not self.object.is_open:
+                return closed_redirect(self.object.id)
             context = self.get_context_data(object=self.object)
             return self.render_to_response(context)
         except Http404:
@@ -52,11 +163,15 @@ class DetailView(generic.DetailView):
 
     def get_queryset(self):
         """Exclude unpublished questions."""
-        return Question.objects.filter(pub_date__lte=timezone.now())
+        return Question.objects.published(self.now).with_state(self.now)
+
 
+class ResultsView(RequestTimeMixin, generic.DetailView):
+    """Question result page.
 
-class ResultsView(generic.DetailView):
-    """Question result page."""
+    Results of closed questions never change, so their page is cached and
+    served without queries.
+    """
 
     model = Question
     template_name = 'polls/results.html'
@@ -68,15 +183,81 @@ class ResultsView(generic.DetailView):
         If there is no such question or it is not available,
         it redirects to the home page with an error message.
         """
+        response = self.get_cached_response()
+        if response is not None:
+            return response
         try:
-            return super(ResultsView, self).get(request, *args, **kwargs)
+            response = super(ResultsView, self).get(request, *args, **kwargs)
         except Http404:
             messages.add_message(request, messages.ERROR, "Question not found")
             return redirect(reverse('polls:index'))
+        if self.is_closed():
+            response.add_post_render_callback(self.cache_response)
+        return response
+
+    def get_cached_response(self):
+        """Return the cached page of a closed question or None."""
+        content = http_cache.get_results_page(self.kwargs['pk'])
+        if content is None:
+            return None
+        return http_cache.patch_shared_cache(HttpResponse(content), settings.POLLS_CLOSED_PAGE_CACHE_TIMEOUT)
+
+    def get_object(self, queryset=None):
+        """Return the question, read again from the primary if it is closed and its page will be cached."""
+        question = super().get_object(queryset)
+        if not question.is_open and question._state.db != DEFAULT_DB_ALIAS:
+            with primary_reads():
+                question = super().get_object(queryset)
+        return question
+
+    def is_closed(self) -> bool:
+        """Return True if voting on the loaded question has ended."""
+        return not self.object.is_open
+
+    def cache_response(self, response):
+        """Cache the rendered page of a closed question."""
+        http_cache.set_results_page(self.object.id, response.content)
+        http_cache.patch_shared_cache(response, settings.POLLS_CLOSED_PAGE_CACHE_TIMEOUT)
 
     def get_queryset(self):
         """Exclude unpublished questions."""
-        return Question.objects.filter(pub_date__lte=timezone.now())
+        return Question.objects.published(self.now).with_state(self.now)
+
+    def get_context_data(self, **kwargs):
+        """Add precomputed results of the question."""
+        context = super().get_context_data(**kwargs)
+        context['results'] = get_results(self.object)
+        context['live'] = settings.POLLS_LIVE_RESULTS and self.object.is_open
+        context['fragment_timeout'] = settings.POLLS_FRAGMENT_CACHE_TIMEOUT
+        return context
+
+
+def render_results_page(question: Question) -> bytes:
+    """Render the results page of a closed question as it is cached for every visitor."""
+    context = {'question': question, 'object': question, 'results': get_results(question), 'live': False,
+               'fragment_timeout': settings.POLLS_FRAGMENT_CACHE_TIMEOUT}
+    return render_to_string(ResultsView.template_name, context).encode()
+
+
+def closed_redirect(question_id: int):
+    """Redirect to results of a closed question, which browsers and proxies may cache."""
+    response = redirect(reverse('polls:results', args=(question_id,)))
+    return http_cache.patch_shared_cache(response, settings.POLLS_CLOSED_PAGE_CACHE_TIMEOUT)
+
+
+def encode_cursor(question: Question) -> str:
+    """Return the pagination cursor of the question."""
+    micros = (question.pub_date - CURSOR_EPOCH) // datetime.timedelta(microseconds=1)
+    return f"{micros}_{question.id}"
+
+
+def decode_cursor(cursor):
+    """Return the (pub_date, id) pair of a cursor or None if it is invalid."""
+    try:
+        micros, pk = cursor.split('_')
+        return CURSOR_EPOCH + datetime.timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
 
 
 @login_required
@@ -95,24 +276,39 @@ def vote(request, question_id: int):
             'question': question,
         })
     else:
-        # selected_choice.votes += 1
         user = request.user
-        vote = get_vote_for_user(question, user)
-        if not vote:
-            vote = Vote.objects.create(choice=selected_choice, voter=user)
-        else:
-            vote.choice = selected_choice
-        vote.save()
-        logger.info(f"{user} voted in {question}.")
+        buffered = settings.POLLS_VOTE_INGESTION == 'buffered'
+        # Write the vote now unless the buffer accepted it.
+        if not buffered or not get_vote_buffer().submit(user.id, question.id, selected_choice.id):
+            Vote.objects.cast(user, selected_choice)
+            transaction.on_commit(lambda: results_changed(question.id))
+        audit.info("%s voted in %s.", user, question,
+                   extra={'event': 'vote', 'username': user.username, 'question_id': question.id})
 
         # Always redirect after POST request to prevent multiple
         # requests if user presses back button.
         return redirect('polls:results', question.id)
 
 
-def get_vote_for_user(question: Question, user: User):
-    """Return vote of the user from the question."""
-    try:
-        return Vote.objects.get(voter=user, choice__question=question)
-    except Vote.DoesNotExist:
-        return None
+def results_changed(question_id: int):
+    """Drop cached results of the question and notify live results streams."""
+    invalidate_results(question_id)
+    http_cache.invalidate_results_page(question_id)
+    broker.publish(question_id)
+
+
+def results_stream(request, pk: int):
+    """Stream results of a published question as Server-Sent Events.
+
+    The response is a sync generator, which suits threaded WSGI servers.
+    Django 3.2 cannot stream async iterators under ASGI. Streams are only
+    served with POLLS_LIVE_RESULTS.
+    """
+    if not settings.POLLS_LIVE_RESULTS:
+        raise Http404("Live results are disabled.")
+    question = get_object_or_404(Question.objects.published(), pk=pk)
+    response = StreamingHttpResponse(stream_results(question), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Ask nginx not to buffer the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response